@@ -0,0 +1,6 @@
+import sys
+
+from lawsuit_generator.load_generator import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+from functools import partial
+import os
+import random
+import time
+
+from lawsuit_generator.lawsuit_factory import LawsuitFactory
+from lawsuit_generator.parallel_factory import _generate_chunk, _init_worker
+
+_END = object()
+
+
+async def _produce(queue: asyncio.Queue, executor, tasks: list, max_pending: int,
+                   batch_size: int=None, factory_kwargs: dict=None):
+    """Run the chunks on the executor and put their folders on the queue.
+
+    At most max_pending chunks run at the same time and the queue is
+    bounded, so a slow consumer stops the generation instead of piling up
+    folders in memory. With factory_kwargs, a factory of this run only is
+    built on the executor and passed to every chunk, so thread executors do
+    not share _WORKER_FACTORY with other runs of this process.
+    """
+    loop = asyncio.get_running_loop()
+    pending = deque()
+    batch = list()
+    tasks = iter(tasks)
+    try:
+        factory = None
+        if factory_kwargs is not None:
+            factory = await loop.run_in_executor(executor, partial(LawsuitFactory,
+                                                                   **factory_kwargs))
+        while True:
+            while len(pending) < max_pending:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                pending.append(loop.run_in_executor(executor, _generate_chunk, task, factory))
+            if not pending:
+                break
+            for folder in await pending.popleft():
+                if batch_size is None:
+                    await queue.put(folder)
+                    continue
+                batch.append(folder)
+                if len(batch) >= batch_size:
+                    await queue.put(batch)
+                    batch = list()
+        if batch:
+            await queue.put(batch)
+    except Exception as err:
+        await queue.put((_END, err))
+    else:
+        await queue.put((_END, None))
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def agenerate_folders(total_folders: int, master_seed: int=None,
+                            workers: int=None, chunk_size: int=10,
+                            queue_size: int=100, batch_size: int=None,
+                            processes: bool=True, serialize: bool=False,
+                            end_date: date=None, start_index: int=0,
+                            **factory_kwargs):
+    """Async generator of lawsuit Folders, generated out of the event loop.
+
+    Chunks of folders are generated on a process pool (or a single thread
+    with processes=False) and handed to the loop through a bounded queue.
+    A thread run builds its own factory, so runs on the same loop do not
+    share one.
+    Folders are seeded from (master_seed, folder index) like
+    generate_parallel_folders, and yielded in index order.
+
+    :param total_folders: Total of Lawsuit Folders to generate
+    :type total_folders: int
+    :param master_seed: Seed of the whole generation, defaults to a random one
+    :type master_seed: int, optional
+    :param workers: Number of worker processes, defaults to os.cpu_count()
+    :type workers: int, optional
+    :param chunk_size: Folders generated by each task, defaults to 10
+    :type chunk_size: int, optional
+    :param queue_size: Max queue items (folders or batches) waiting for the
+        consumer, defaults to 100
+    :type queue_size: int, optional
+    :param batch_size: Yield lists of up to batch_size folders instead of
+        single folders, defaults to None (no batching)
+    :type batch_size: int, optional
+    :param processes: Generate on a process pool, False uses one thread,
+        defaults to True
+    :type processes: bool, optional
+    :param serialize: Yield folder.to_json() instead of FakeFolder, defaults to False
+    :type serialize: bool, optional
+    :param end_date: Latest date for generated dates, defaults to today
+    :type end_date: date, optional
+    :param start_index: Index of the first folder, defaults to 0
+    :type start_index: int, optional
+    :param factory_kwargs: Other LawsuitFactory arguments, like text_pool_size
+    :raises ValueError: If chunk_size, queue_size or batch_size is smaller than 1
+    :return: Folders (or batches of folders) generated
+    :rtype: async generator
+    """
+    if chunk_size < 1 or queue_size < 1 or (batch_size is not None and batch_size < 1):
+        raise ValueError("chunk_size, queue_size and batch_size must be greater than zero")
+    if master_seed is None:
+        master_seed = random.getrandbits(64)
+    factory_kwargs.update(seed=master_seed, end_date=end_date or date.today())
+
+    tasks = list()
+    last_index = start_index + total_folders
+    for start in range(start_index, last_index, chunk_size):
+        tasks.append((start, min(chunk_size, last_index - start), serialize))
+
+    if processes:
+        workers = workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(factory_kwargs,))
+        thread_kwargs = None
+    else:
+        workers = 1
+        executor = ThreadPoolExecutor(max_workers=1)
+        thread_kwargs = factory_kwargs
+
+    queue = asyncio.Queue(maxsize=queue_size)
+    producer = asyncio.ensure_future(_produce(queue, executor, tasks, workers, batch_size,
+                                              thread_kwargs))
+    try:
+        while True:
+            item = await queue.get()
+            if type(item) is tuple and item[0] is _END:
+                if item[1] is not None:
+                    raise item[1]
+                break
+            yield item
+    finally:
+        producer.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class MemorySink():
+    def __init__(self, delay: float=0.0, keep: bool=False):
+        """In-process sink to measure agenerate_folders throughput.
+
+        :param delay: Seconds awaited per item received, to simulate a slow
+            consumer, defaults to 0.0
+        :type delay: float, optional
+        :param keep: Keep the received folders on self.items, defaults to False
+        :type keep: bool, optional
+        """
+        self.delay = delay
+        self.keep = keep
+        self.items = list()
+        self.total_items = 0
+        self.total_folders = 0
+        self.started_at = None
+        self.finished_at = None
+
+    async def send(self, item):
+        """Receive a folder or a batch of folders.
+
+        :param item: Folder, folder dict or list of them
+        :type item: FakeFolder | dict | list
+        """
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.total_items += 1
+        self.total_folders += len(item) if isinstance(item, list) else 1
+        if self.keep:
+            self.items.append(item)
+        self.finished_at = time.perf_counter()
+
+    def stats(self) -> dict:
+        """Items and folders received, and folders per second.
+
+        :return: total_items, total_folders, seconds and folders_per_sec
+        :rtype: dict
+        """
+        seconds = 0.0
+        if self.started_at is not None:
+            seconds = self.finished_at - self.started_at
+        return {"total_items": self.total_items,
+                "total_folders": self.total_folders,
+                "seconds": seconds,
+                "folders_per_sec": self.total_folders / seconds if seconds else 0.0}
+
+
+async def feed_sink(sink, total_folders: int, **kwargs) -> dict:
+    """Send agenerate_folders output to a sink, awaiting each send.
+
+    :param sink: Object with an async send(item) method, like MemorySink
+    :type sink: MemorySink
+    :param total_folders: Total of Lawsuit Folders to generate
+    :type total_folders: int
+    :param kwargs: Other agenerate_folders arguments
+    :return: Sink stats, when it has a stats() method
+    :rtype: dict
+    """
+    async for item in agenerate_folders(total_folders, **kwargs):
+        await sink.send(item)
+    return sink.stats() if hasattr(sink, "stats") else None
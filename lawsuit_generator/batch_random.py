@@ -0,0 +1,91 @@
+from datetime import date
+
+#NOTE Same lower bound Faker uses for date() and date_time()
+MIN_YEAR = 1970
+
+
+class BatchRandom():
+    def __init__(self, fake, end_date: date=None):
+        """Cheap random draws for LawsuitFactory, skipping Faker's per call
+        overhead.
+
+        Integers, booleans and choices are scaled straight from the factory
+        random stream and dates are sampled from tables of already formatted
+        strings, built once per format, so a list of event dates is a list
+        of table lookups.
+
+        :param fake: Faker instance whose random stream is used, read on
+            every draw so streams swapped in by LazyEvents are honored
+        :type fake: Faker
+        :param end_date: Latest date drawn, defaults to None (today)
+        :type end_date: date, optional
+        """
+        self.fake = fake
+        self.end_date = end_date or date.today()
+        self._first_ordinal = date(min(MIN_YEAR, self.end_date.year), 1, 1).toordinal()
+        self._tables = dict()
+
+    def integer(self, min_value: int, max_value: int) -> int:
+        """Integer between min_value and max_value, both included."""
+        return min_value + int(self.fake.random.random() * (max_value - min_value + 1))
+
+    def boolean(self, chance_of_getting_true: int=50) -> bool:
+        """True with the given percentage, like Faker's boolean."""
+        return self.fake.random.random() * 100 < chance_of_getting_true
+
+    def choice(self, elements):
+        """One element of a sequence, uniformly."""
+        return elements[int(self.fake.random.random() * len(elements))]
+
+    def dates(self, min_year: int, total: int, date_format: str="%Y-%m-%d") -> list:
+        """Formatted dates between January 1st of min_year and end_date.
+
+        :param min_year: First year of the range
+        :type min_year: int
+        :param total: Total of dates
+        :type total: int
+        :param date_format: strftime format, defaults to "%Y-%m-%d"
+        :type date_format: str, optional
+        :return: Formatted dates
+        :rtype: list
+        """
+        table, start, span = self._date_range(min_year, date_format)
+        random = self.fake.random.random
+        return [table[start + int(random() * span)] for _ in range(total)]
+
+    def sorted_dates(self, min_year: int, total: int, date_format: str="%Y-%m-%d"):
+        """Same distribution as dates, yielded in chronological order.
+
+        Each date is drawn as the next order statistic of the remaining
+        uniform draws, so the dates come out sorted in a single pass without
+        keeping or sorting a list.
+
+        :param min_year: First year of the range
+        :type min_year: int
+        :param total: Total of dates
+        :type total: int
+        :param date_format: strftime format, defaults to "%Y-%m-%d"
+        :type date_format: str, optional
+        :return: Formatted dates, oldest first
+        :rtype: generator
+        """
+        table, start, span = self._date_range(min_year, date_format)
+        random = self.fake.random.random
+        position = 0.0
+        for remaining in range(total, 0, -1):
+            position += (1.0 - position) * (1.0 - random() ** (1.0 / remaining))
+            yield table[start + min(int(position * span), span - 1)]
+
+    def _date_range(self, min_year: int, date_format: str) -> tuple:
+        table = self._table(date_format)
+        start = max(0, date(int(min_year), 1, 1).toordinal() - self._first_ordinal)
+        start = min(start, len(table) - 1)
+        return table, start, len(table) - start
+
+    def _table(self, date_format: str) -> list:
+        table = self._tables.get(date_format)
+        if table is None:
+            table = [date.fromordinal(ordinal).strftime(date_format)
+                     for ordinal in range(self._first_ordinal, self.end_date.toordinal() + 1)]
+            self._tables[date_format] = table
+        return table
@@ -0,0 +1,228 @@
+"""Generator benchmark suite.
+
+Usage:
+    python -m lawsuit_generator.benchmark --output results.json
+    python -m lawsuit_generator.benchmark --baseline results.json --tolerance 0.15
+"""
+import argparse
+from datetime import date
+import json
+import platform
+import sys
+import time
+
+import faker
+
+from lawsuit_generator import __version__
+from lawsuit_generator.lawsuit_factory import LawsuitFactory
+
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
+EVENT_LISTS = ("progress_list", "publication_list", "appendix_list",
+               "petition_list", "audition_list", "classification_list")
+
+
+def peak_rss_kb() -> int:
+    """Peak resident memory of the process, in KiB (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #NOTE macOS reports bytes, Linux reports KiB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _measure(function, total: int) -> dict:
+    start = time.perf_counter()
+    for _ in range(total):
+        function()
+    seconds = time.perf_counter() - start
+    return {"calls": total, "seconds": seconds, "per_sec": total / seconds if seconds else None}
+
+
+def _measure_events(function, total: int) -> dict:
+    start = time.perf_counter()
+    events = function(total)
+    seconds = time.perf_counter() - start
+    return {"calls": 1, "seconds": seconds,
+            "events_per_sec": len(events) / seconds if seconds else None}
+
+
+def _count_events(lawsuit) -> int:
+    return sum(len(getattr(lawsuit, event_list)) for event_list in EVENT_LISTS)
+
+
+def run_benchmark(total_folders: int=20, scale: int=1000, seed: int=0,
+                  **factory_kwargs) -> dict:
+    """Time every generation stage with a seeded factory.
+
+    :param total_folders: Folders for the folder and serialization stages, defaults to 20
+    :type total_folders: int, optional
+    :param scale: Calls/events for the unit stages, defaults to 1000
+    :type scale: int, optional
+    :param seed: Factory seed, defaults to 0
+    :type seed: int, optional
+    :param factory_kwargs: Other LawsuitFactory arguments, like text_pool_size
+    :return: Environment info, results per stage and peak RSS
+    :rtype: dict
+    """
+    factory_start = time.perf_counter()
+    factory = LawsuitFactory(seed=seed, end_date=date(2021, 12, 31), **factory_kwargs)
+    stages = {"factory_init": {"calls": 1, "seconds": time.perf_counter() - factory_start}}
+
+    min_year = "2000"
+    stages["generate_nup"] = _measure(factory.generate_nup, scale)
+    stages["generate_nups"] = _measure_events(factory.generate_nups, scale * 100)
+    stages["generate_part"] = _measure(factory.generate_part, scale)
+    stages["generate_part_lawyer"] = _measure(lambda: factory.generate_part(lawyer=True), scale)
+    stages["generate_header"] = _measure(
+        lambda: factory.generate_header("0000001-45.2020.8.26.0001", 1, "TJSP"), scale)
+    stages["generate_progress"] = _measure_events(
+        lambda total: factory.generate_progress(min_year, total_progress=total), scale)
+    stages["generate_publication"] = _measure_events(
+        lambda total: factory.generate_publication(min_year, "0000001-45.2020.8.26.0001",
+                                                   "Procedimento Comum", "Parte A - Parte B",
+                                                   "Advogado A", total_publications=total),
+        scale)
+    stages["generate_appendix"] = _measure_events(
+        lambda total: factory.generate_appendix(min_year, total_appendix=total), scale)
+    stages["generate_petition"] = _measure_events(
+        lambda total: factory.generate_petition(min_year, total_petition=total), scale)
+    stages["generate_auditions"] = _measure_events(
+        lambda total: factory.generate_auditions(min_year, total_auditions=total), scale)
+    publications = factory.generate_publication(min_year, "0000001-45.2020.8.26.0001",
+                                                "Procedimento Comum", "Parte A", "Advogado A",
+                                                total_publications=scale)
+    stages["generate_classification"] = _measure(
+        lambda: factory.generate_classification(publications, "publicacao"), 10)
+
+    start = time.perf_counter()
+    lawsuits = [factory.generate_full_lawsuit() for _ in range(total_folders)]
+    seconds = time.perf_counter() - start
+    total_events = sum(_count_events(lawsuit) for lawsuit in lawsuits)
+    stages["generate_full_lawsuit"] = {"calls": total_folders, "seconds": seconds,
+                                       "per_sec": total_folders / seconds,
+                                       "events_per_sec": total_events / seconds}
+    del lawsuits
+
+    start = time.perf_counter()
+    folders = list(factory.generate_multiple_folders(total_folders))
+    seconds = time.perf_counter() - start
+    total_events = 0
+    for folder in folders:
+        total_events += _count_events(folder.main_lawsuit)
+        for lawsuit_list in (folder.appeals_list, folder.recourses_list,
+                             folder.attached_list, folder.dependent_list):
+            total_events += sum(_count_events(lawsuit) for lawsuit in lawsuit_list)
+    stages["generate_full_folder"] = {"calls": total_folders, "seconds": seconds,
+                                      "per_sec": total_folders / seconds,
+                                      "events_per_sec": total_events / seconds}
+
+    start = time.perf_counter()
+    json_folders = [folder.to_json() for folder in folders]
+    seconds = time.perf_counter() - start
+    stages["folder_to_json"] = {"calls": total_folders, "seconds": seconds,
+                                "per_sec": total_folders / seconds}
+
+    start = time.perf_counter()
+    total_bytes = sum(len(json.dumps(json_obj, ensure_ascii=False).encode("utf-8"))
+                      for json_obj in json_folders)
+    seconds = time.perf_counter() - start
+    stages["folder_json_dumps"] = {"calls": total_folders, "seconds": seconds,
+                                   "per_sec": total_folders / seconds,
+                                   "bytes_per_sec": total_bytes / seconds}
+
+    return {"environment": {"python": platform.python_version(),
+                            "platform": platform.platform(),
+                            "faker": faker.VERSION,
+                            "lawsuit_generator": __version__},
+            "parameters": {"total_folders": total_folders, "scale": scale, "seed": seed,
+                           "factory_kwargs": {key: repr(value) for key, value in factory_kwargs.items()}},
+            "stages": stages,
+            "peak_rss_kb": peak_rss_kb()}
+
+
+def compare_results(results: dict, baseline: dict, tolerance: float=0.1) -> list:
+    """Find stages slower than the baseline by more than tolerance.
+
+    Every rate (per_sec, events_per_sec, bytes_per_sec) present on both
+    results is compared.
+
+    :param results: Output of run_benchmark
+    :type results: dict
+    :param baseline: Saved output of run_benchmark
+    :type baseline: dict
+    :param tolerance: Accepted slowdown, 0.1 = 10%, defaults to 0.1
+    :type tolerance: float, optional
+    :return: One dict per regression, with stage, metric, baseline, current and ratio
+    :rtype: list
+    """
+    regressions = list()
+    for stage, baseline_stage in baseline.get("stages", {}).items():
+        current_stage = results["stages"].get(stage)
+        if not current_stage:
+            continue
+        for metric in ("per_sec", "events_per_sec", "bytes_per_sec"):
+            baseline_value = baseline_stage.get(metric)
+            current_value = current_stage.get(metric)
+            if not baseline_value or current_value is None:
+                continue
+            ratio = current_value / baseline_value
+            if ratio < 1 - tolerance:
+                regressions.append({"stage": stage, "metric": metric,
+                                    "baseline": baseline_value, "current": current_value,
+                                    "ratio": ratio})
+    return regressions
+
+
+def main(argv: list=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the lawsuit generator stages.")
+    parser.add_argument("--folders", type=int, default=20, help="folders for folder stages")
+    parser.add_argument("--scale", type=int, default=1000, help="calls/events for unit stages")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--text-pool-size", type=int, default=None)
+    parser.add_argument("--batch-random", action="store_true",
+                        help="draw counts, choices and dates with BatchRandom")
+    parser.add_argument("--fast-start", action="store_true",
+                        help="build the factory with only the Faker providers it uses")
+    parser.add_argument("--output", help="write results as json to this file")
+    parser.add_argument("--baseline", help="compare against results saved by --output")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="accepted slowdown against the baseline, defaults to 0.1")
+    args = parser.parse_args(argv)
+
+    factory_kwargs = dict()
+    if args.text_pool_size:
+        factory_kwargs["text_pool_size"] = args.text_pool_size
+    if args.batch_random:
+        factory_kwargs["batch_random"] = True
+    if args.fast_start:
+        factory_kwargs["fast_start"] = True
+    results = run_benchmark(args.folders, args.scale, args.seed, **factory_kwargs)
+
+    for stage, values in results["stages"].items():
+        rates = "  ".join(f"{metric}={values[metric]:.1f}"
+                          for metric in ("per_sec", "events_per_sec", "bytes_per_sec")
+                          if values.get(metric))
+        print(f"{stage:<25} {values['seconds']:8.3f}s  {rates}")
+    print(f"peak_rss_kb={results['peak_rss_kb']}")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as baseline_file:
+            regressions = compare_results(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['stage']} {regression['metric']}: "
+                  f"{regression['current']:.1f} vs {regression['baseline']:.1f} "
+                  f"({regression['ratio']:.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+from datetime import date, timedelta
+import json
+import math
+import random
+
+from lawsuit_generator.fake_lawsuit import CompactFolder, classification_reference
+from lawsuit_generator.lawsuit_factory import derive_seed
+
+#NOTE change = (tick, op, key, field, value)
+# "event": key lawsuit_number, field event list, value event dict
+# "classification": key lawsuit_number, value classification with the
+#   evento_index of its publication in publication_list instead of evento_obj
+# "status": key lawsuit_number, value new status
+# "lawsuit": key main_number, field folder list (appeals_list...), value lawsuit
+CHANGE_OPS = ("event", "classification", "status", "lawsuit")
+
+EVENT_DATE_FIELDS = {"progress_list": "data_movimentacao",
+                     "publication_list": "data_publicacao"}
+
+
+def _poisson(rnd, mean: float) -> int:
+    limit = math.exp(-mean)
+    total = 0
+    product = rnd.random()
+    while product > limit:
+        total += 1
+        product *= rnd.random()
+    return total
+
+
+def _number_key(number: str) -> int:
+    return int("".join(char for char in number if char.isdigit()) or 0)
+
+
+class CaseEvolution():
+    def __init__(self, factory, start_date: date=None, tick_days: int=1,
+                 progress_rate: float=0.5, publication_rate: float=0.3,
+                 classification_chance: float=0.1, status_chance: float=0.02,
+                 appeal_chance: float=0.005, recourse_chance: float=0.002):
+        """Produce the changes a folder receives over simulated ticks.
+
+        Tick t covers the tick_days days after start_date + (t - 1) * tick_days,
+        so new events are always dated after every generated event and after
+        the events of earlier ticks. With a seeded factory the delta of a
+        folder on a tick depends only on (seed, main_number, tick), so ticks
+        can be produced in any order, or again, without keeping state.
+
+        The publication totals of a lawsuit come from their own stream,
+        seeded by (seed, lawsuit_number), so a tick knows how many
+        publications earlier ticks added without producing them, and gives
+        new classifications their final evento_index.
+
+        :param factory: Factory used to generate events and lawsuits, the one
+            that generated the folders
+        :type factory: LawsuitFactory
+        :param start_date: Date of tick 0, defaults to the factory end_date
+        :type start_date: date, optional
+        :param tick_days: Days per tick, defaults to 1
+        :type tick_days: int, optional
+        :param progress_rate: Mean new progress per lawsuit per tick, defaults to 0.5
+        :type progress_rate: float, optional
+        :param publication_rate: Mean new publications per lawsuit per tick,
+            defaults to 0.3
+        :type publication_rate: float, optional
+        :param classification_chance: Chance of a new publication to be
+            classified, defaults to 0.1
+        :type classification_chance: float, optional
+        :param status_chance: Chance of a lawsuit to change status per tick,
+            defaults to 0.02
+        :type status_chance: float, optional
+        :param appeal_chance: Chance of a folder to get an appeal per tick,
+            defaults to 0.005
+        :type appeal_chance: float, optional
+        :param recourse_chance: Chance of a folder to get a recourse per
+            tick, defaults to 0.002
+        :type recourse_chance: float, optional
+        """
+        self.factory = factory
+        if start_date is None:
+            start_date = date.today() if factory.end_date == "now" else factory.end_date
+        self.start_date = start_date
+        self.tick_days = tick_days
+        self.progress_rate = progress_rate
+        self.publication_rate = publication_rate
+        self.classification_chance = classification_chance
+        self.status_chance = status_chance
+        self.appeal_chance = appeal_chance
+        self.recourse_chance = recourse_chance
+
+    def tick_date(self, tick: int) -> date:
+        """Last day covered by a tick."""
+        return self.start_date + timedelta(days=tick * self.tick_days)
+
+    def publication_totals(self, lawsuit_number: str, tick: int) -> tuple:
+        """New publications of a lawsuit before a tick and on it.
+
+        :param lawsuit_number: Lawsuit number
+        :type lawsuit_number: str
+        :param tick: Tick number, from 1
+        :type tick: int
+        :return: (publications added by ticks 1 to tick - 1, publications
+            added on tick)
+        :rtype: tuple
+        """
+        rnd = random.Random(derive_seed(self.factory.seed or 0, _number_key(lawsuit_number)))
+        earlier = sum(_poisson(rnd, self.publication_rate) for _ in range(tick - 1))
+        return earlier, _poisson(rnd, self.publication_rate)
+
+    def _event_date(self, rnd, tick: int) -> str:
+        day = self.start_date + timedelta(days=(tick - 1) * self.tick_days
+                                          + 1 + int(rnd.random() * self.tick_days))
+        return day.strftime("%Y-%m-%d")
+
+    def delta(self, folder, tick: int) -> list:
+        """Changes of a folder on a tick.
+
+        :param folder: Folder to evolve, as generated, without changes
+            applied. Only numbers, headers, parts and event counts are read,
+            so lazy events are not generated
+        :type folder: FakeFolder | CompactFolder
+        :param tick: Tick number, from 1
+        :type tick: int
+        :return: Changes, see CHANGE_OPS
+        :rtype: list
+        """
+        factory = self.factory
+        if factory.seed is not None:
+            factory.fake.seed_instance(derive_seed(derive_seed(factory.seed,
+                                                               _number_key(folder.main_number)),
+                                                   tick))
+        rnd = factory.fake.random
+        changes = list()
+        lawsuits = [folder.main_lawsuit, *folder.appeals_list, *folder.recourses_list,
+                    *folder.attached_list, *folder.dependent_list]
+        for lawsuit in lawsuits:
+            if lawsuit.is_secret:
+                continue
+            number = lawsuit.lawsuit_number
+            if rnd.random() < self.status_chance:
+                changes.append((tick, "status", number, None, factory.generate_status()))
+            total_progress = _poisson(rnd, self.progress_rate)
+            for progress in factory.iter_progress(lawsuit.year, total_progress):
+                progress["data_movimentacao"] = self._event_date(rnd, tick)
+                changes.append((tick, "event", number, "progress_list", progress))
+            earlier, total_publications = self.publication_totals(number, tick)
+            if not total_publications:
+                continue
+            first_index = lawsuit.event_counts["publication"] + earlier
+            events_args = factory.events_args(
+                {"year": lawsuit.year, "complete": number}, lawsuit.header or {},
+                {"part_active": lawsuit.part_active_list,
+                 "part_active_lawyer": lawsuit.part_active_lawyer_list,
+                 "part_passive": lawsuit.part_passive_list,
+                 "part_passive_lawyer": lawsuit.part_passive_lawyer_list})
+            publications = factory.iter_publication(total_publications=total_publications,
+                                                    **events_args)
+            for position, publication in enumerate(publications, first_index):
+                publication["data_publicacao"] = self._event_date(rnd, tick)
+                changes.append((tick, "event", number, "publication_list", publication))
+                if rnd.random() < self.classification_chance:
+                    classification = factory.classify_event(publication, "publicacao")
+                    changes.append((tick, "classification", number, None,
+                                    classification_reference(classification, position)))
+        if rnd.random() < self.appeal_chance:
+            appeal = factory.generate_full_lawsuit(lw_instance=1, is_main=False, is_appeal=True)
+            changes.append((tick, "lawsuit", folder.main_number, "appeals_list", appeal))
+        if rnd.random() < self.recourse_chance:
+            recourse = factory.generate_full_lawsuit(lw_instance=2, is_main=False,
+                                                     is_recourse=True)
+            changes.append((tick, "lawsuit", folder.main_number, "recourses_list", recourse))
+        return changes
+
+    def delta_at(self, index: int, tick: int) -> list:
+        """Changes of the folder at an index of the seeded dataset on a
+        tick, see LawsuitFactory.generate_folder_at.
+
+        :param index: Position of the folder in the dataset
+        :type index: int
+        :param tick: Tick number, from 1
+        :type tick: int
+        :return: Changes, see CHANGE_OPS
+        :rtype: list
+        """
+        return self.delta(self.factory.generate_folder_at(index), tick)
+
+    def iter_changes(self, folders, ticks):
+        """Changes of many folders over many ticks, tick by tick.
+
+        :param folders: Folders to evolve, kept for all ticks
+        :type folders: list
+        :param ticks: Tick numbers, like range(1, 31)
+        :type ticks: iterable
+        :return: Changes, see CHANGE_OPS
+        :rtype: generator
+        """
+        for tick in ticks:
+            for folder in folders:
+                yield from self.delta(folder, tick)
+
+
+def apply_changes(folder, changes) -> int:
+    """Apply changes made by CaseEvolution to a FakeFolder, in place.
+
+    Changes are applied sorted by tick, so the changes of many ticks can be
+    given in any order, but every tick from 1 has to be applied, and ticks
+    given in later calls must come after the ticks of earlier calls: new
+    events are appended and classifications find their publication by
+    evento_index.
+
+    :param folder: Folder the changes were produced for
+    :type folder: FakeFolder
+    :param changes: Changes, see CHANGE_OPS
+    :type changes: iterable
+    :raises TypeError: If folder is a CompactFolder, its lists are read only
+    :raises ValueError: If an op is unknown, or a classification does not
+        match its publication (ticks applied out of order)
+    :return: Total of changes applied
+    :rtype: int
+    """
+    if isinstance(folder, CompactFolder):
+        raise TypeError("changes can not be applied to a CompactFolder, use a FakeFolder")
+    lawsuits = {lawsuit.lawsuit_number: lawsuit
+                for lawsuit in (folder.main_lawsuit, *folder.appeals_list, *folder.recourses_list,
+                                *folder.attached_list, *folder.dependent_list)}
+    total = 0
+    classifications = list()
+    for _, op, key, field, value in sorted(changes, key=lambda change: change[0]):
+        if op == "lawsuit":
+            getattr(folder, field).append(value)
+            lawsuits[value.lawsuit_number] = value
+        elif op == "status":
+            lawsuits[key].status = value
+        elif op == "event":
+            getattr(lawsuits[key], field).append(value)
+        elif op == "classification":
+            classifications.append((key, value))
+        else:
+            raise ValueError(f"unknown change op {op}")
+        total += 1
+    for key, value in classifications:
+        lawsuit = lawsuits[key]
+        publication = lawsuit.publication_list[value["evento_index"]]
+        match = value["match"]
+        if publication["publicacao"][match["inicio"]:match["fim"]] != match["termo"]:
+            raise ValueError(f"classification of {key} does not match publication "
+                             f"{value['evento_index']}, ticks applied out of order")
+        classification = {"evento_obj": publication}
+        classification.update((field, item) for field, item in value.items()
+                              if field != "evento_index")
+        lawsuit.classification_list.append(classification)
+    return total
+
+
+def encode_change(change: tuple) -> str:
+    """Compact JSON line of a change: [tick, op, key, field, value].
+
+    :param change: Change, see CHANGE_OPS
+    :type change: tuple
+    :return: JSON text, without line break
+    :rtype: str
+    """
+    tick, op, key, field, value = change
+    if hasattr(value, "to_json"):
+        value = value.to_json(classification_refs=True)
+    return json.dumps([tick, op, key, field, value], ensure_ascii=False)
+
+
+def write_changes(output_file, changes) -> int:
+    """Write changes as JSON lines to a text file object.
+
+    :param output_file: File opened in text mode
+    :type output_file: file
+    :param changes: Changes, see CHANGE_OPS
+    :type changes: iterable
+    :return: Total of changes written
+    :rtype: int
+    """
+    total = 0
+    for change in changes:
+        output_file.write(encode_change(change) + "\n")
+        total += 1
+    return total
@@ -0,0 +1,231 @@
+import os
+
+HEADER_FIELDS = ("classe", "assunto", "foro", "area", "vara", "comarca",
+                 "url_processo", "juiz", "distribuicao", "valor_causa")
+
+PART_ROLES = (("active", "part_active_list"),
+              ("active_lawyer", "part_active_lawyer_list"),
+              ("passive", "part_passive_list"),
+              ("passive_lawyer", "part_passive_lawyer_list"),
+              ("other", "part_other_list"))
+
+#NOTE table name: (FakeLawsuit attribute, event fields)
+EVENT_TABLES = {
+    "progress": ("progress_list", ("data_movimentacao", "movimentacao", "url_documento")),
+    "publication": ("publication_list", ("data_publicacao", "publicacao", "url_documento")),
+    "appendix": ("appendix_list", ("data_documento", "descricao", "url_documento")),
+    "petition": ("petition_list", ("data_peticao", "tipo")),
+    "audition": ("audition_list", ("data_audiencia", "audiencia", "situacao", "qtd_pessoas")),
+}
+
+
+def _build_schemas(pa) -> dict:
+    """Build the arrow schema of every exported table.
+
+    :param pa: pyarrow module
+    :type pa: module
+    :return: Table name to schema
+    :rtype: dict
+    """
+    string = pa.string()
+    schemas = {
+        "lawsuits": pa.schema(
+            [("lawsuit_number", string), ("main_number", string), ("year", string),
+             ("segment", string), ("region", string), ("origin", string),
+             ("court_house", string), ("status", string), ("instance", pa.int32()),
+             ("is_secret", pa.bool_()), ("is_main", pa.bool_()), ("is_appeal", pa.bool_()),
+             ("is_recourse", pa.bool_()), ("is_attached", pa.bool_()),
+             ("is_dependent", pa.bool_())]
+            + [(field, string) for field in HEADER_FIELDS]),
+        "parts": pa.schema([("lawsuit_number", string), ("role", string),
+                            ("position", pa.int32()), ("nome", string),
+                            ("documento", string)]),
+        "classifications": pa.schema([("lawsuit_number", string), ("position", pa.int32()),
+                                      ("tipo_evento", string), ("evento_index", pa.int32()),
+                                      ("classificacao", string), ("ativo", pa.bool_()),
+                                      ("inicio", pa.int32()), ("fim", pa.int32()),
+                                      ("termo", string)]),
+    }
+    for table_name, (_, fields) in EVENT_TABLES.items():
+        columns = [("lawsuit_number", string), ("position", pa.int32())]
+        columns += [(field, pa.int32() if field == "qtd_pessoas" else string) for field in fields]
+        schemas[table_name] = pa.schema(columns)
+    return schemas
+
+
+class ColumnarExporter():
+    def __init__(self, directory: str, file_format: str="parquet", batch_size: int=10000,
+                 compression: str="snappy"):
+        """Export generated folders as columnar tables, one file per table.
+
+        Tables: lawsuits, parts, classifications and one per event type
+        (progress, publication, appendix, petition, audition), all keyed by
+        lawsuit_number. Rows are accumulated straight into column buffers and
+        written as record batches of batch_size rows.
+
+        :param directory: Directory where the table files are written
+        :type directory: str
+        :param file_format: "parquet" or "arrow" (IPC file), defaults to "parquet"
+        :type file_format: str, optional
+        :param batch_size: Rows per record batch, defaults to 10000
+        :type batch_size: int, optional
+        :param compression: Parquet compression codec, defaults to "snappy"
+        :type compression: str, optional
+        :raises ValueError: If file_format is not supported
+        :raises ImportError: If pyarrow is not installed
+        """
+        if file_format not in ("parquet", "arrow"):
+            raise ValueError("file_format must be 'parquet' or 'arrow'")
+        try:
+            import pyarrow
+        except ImportError as err:
+            raise ImportError("columnar export needs the 'pyarrow' package") from err
+        self._pa = pyarrow
+        self.directory = directory
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.compression = compression
+        self.schemas = _build_schemas(pyarrow)
+        self.total_rows = {table_name: 0 for table_name in self.schemas}
+        self._columns = {table_name: {name: [] for name in schema.names}
+                         for table_name, schema in self.schemas.items()}
+        self._writers = dict()
+        self._closed = False
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_folder(self, folder):
+        """Add every lawsuit of a FakeFolder.
+
+        :param folder: Folder generated by LawsuitFactory
+        :type folder: FakeFolder | CompactFolder
+        """
+        main_number = folder.main_number
+        self.add_lawsuit(folder.main_lawsuit, main_number)
+        for lawsuit_list in (folder.appeals_list, folder.recourses_list,
+                             folder.attached_list, folder.dependent_list):
+            for lawsuit in lawsuit_list:
+                self.add_lawsuit(lawsuit, main_number)
+
+    def add_folders(self, folders) -> int:
+        """Consume a folders iterable, like generate_multiple_folders.
+
+        :param folders: Iterable of FakeFolder
+        :type folders: iterable
+        :return: Total of folders added
+        :rtype: int
+        """
+        total = 0
+        for folder in folders:
+            self.add_folder(folder)
+            total += 1
+        return total
+
+    def add_lawsuit(self, lawsuit, main_number: str=None):
+        """Add a lawsuit row and all its parts, events and classifications.
+
+        :param lawsuit: Lawsuit generated by LawsuitFactory
+        :type lawsuit: FakeLawsuit | CompactLawsuit
+        :param main_number: Number of the folder main lawsuit, defaults to None
+        :type main_number: str, optional
+        """
+        #NOTE to_json keys are the attribute names, and with classification_refs
+        # the classifications already carry the publication position
+        lawsuit = lawsuit.to_json(classification_refs=True)
+        number = lawsuit["lawsuit_number"]
+        header = lawsuit["header"] or {}
+        self._add_row("lawsuits", (
+            number, main_number, lawsuit["year"], lawsuit["segment"], lawsuit["region"],
+            lawsuit["origin"], lawsuit["court_house"], lawsuit["status"], lawsuit["instance"],
+            lawsuit["is_secret"], lawsuit["is_main"], lawsuit["is_appeal"],
+            lawsuit["is_recourse"], lawsuit["is_attached"], lawsuit["is_dependent"],
+            *(header.get(field) for field in HEADER_FIELDS)))
+
+        for role, attribute in PART_ROLES:
+            for position, part in enumerate(lawsuit[attribute]):
+                if part:
+                    self._add_row("parts", (number, role, position, part["nome"],
+                                            part.get("documento")))
+
+        for table_name, (attribute, fields) in EVENT_TABLES.items():
+            for position, event in enumerate(lawsuit[attribute]):
+                self._add_row(table_name, (number, position,
+                                           *(event.get(field) for field in fields)))
+
+        for position, classification in enumerate(lawsuit["classification_list"]):
+            match = classification["match"]
+            self._add_row("classifications", (
+                number, position, classification["tipo_evento"],
+                classification["evento_index"],
+                classification["classificacao"], classification["ativo"],
+                match["inicio"], match["fim"], match["termo"]))
+
+    def close(self):
+        """Write pending rows and close every table file.
+
+        Tables without any row are still written, empty, with their schema.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for table_name in self._columns:
+            self._write_batch(table_name)
+            if table_name not in self._writers:
+                self._writers[table_name] = self._open_writer(table_name,
+                                                              self.schemas[table_name])
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = dict()
+
+    def _add_row(self, table_name: str, values: tuple):
+        columns = self._columns[table_name]
+        for column, value in zip(columns.values(), values):
+            column.append(value)
+        self.total_rows[table_name] += 1
+        if len(columns["lawsuit_number"]) >= self.batch_size:
+            self._write_batch(table_name)
+
+    def _write_batch(self, table_name: str):
+        columns = self._columns[table_name]
+        if not columns["lawsuit_number"]:
+            return
+        schema = self.schemas[table_name]
+        batch = self._pa.RecordBatch.from_pydict(columns, schema=schema)
+        writer = self._writers.get(table_name)
+        if writer is None:
+            writer = self._open_writer(table_name, schema)
+            self._writers[table_name] = writer
+        if self.file_format == "parquet":
+            writer.write_batch(batch)
+        else:
+            writer.write(batch)
+        self._columns[table_name] = {name: [] for name in schema.names}
+
+    def _open_writer(self, table_name: str, schema):
+        if self.file_format == "parquet":
+            import pyarrow.parquet as pq
+            path = os.path.join(self.directory, f"{table_name}.parquet")
+            return pq.ParquetWriter(path, schema, compression=self.compression)
+        import pyarrow.ipc as ipc
+        path = os.path.join(self.directory, f"{table_name}.arrow")
+        return ipc.new_file(path, schema)
+
+
+def export_folders(directory: str, folders, **kwargs) -> dict:
+    """Export folders to columnar tables, see ColumnarExporter.
+
+    :param directory: Directory where the table files are written
+    :type directory: str
+    :param folders: Iterable of FakeFolder
+    :type folders: iterable
+    :return: Total of rows written per table
+    :rtype: dict
+    """
+    with ColumnarExporter(directory, **kwargs) as exporter:
+        exporter.add_folders(folders)
+    return exporter.total_rows
@@ -0,0 +1,70 @@
+from functools import lru_cache
+import json
+import pkgutil
+import re
+from types import MappingProxyType
+
+
+@lru_cache(maxsize=None)
+def load_court_relation() -> MappingProxyType:
+    """Load court_state_relation.json from the package, once per process.
+
+    The file is read through the package loader, so it does not depend on
+    the current working directory, and every table is returned read-only
+    because all factories share it.
+
+    :return: Read-only mapping of table name (STATES, TJ, TRF, TRT) to table
+    :rtype: MappingProxyType
+    """
+    raw_data = pkgutil.get_data("lawsuit_generator", "court_state_relation.json")
+    relation = json.loads(raw_data.decode("utf-8"))
+    return MappingProxyType({table_name: MappingProxyType(table)
+                             for table_name, table in relation.items()})
+
+
+COURT_RELATION = load_court_relation()
+STATES = COURT_RELATION["STATES"]
+TJ = COURT_RELATION["TJ"]
+TRF = COURT_RELATION["TRF"]
+TRT = COURT_RELATION["TRT"]
+
+#NOTE CNJ region code of each state court (segment 8), 01 = AC ... 27 = TO
+TJ_REGIONS = ("AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA", "MT",
+              "MS", "MG", "PA", "PB", "PR", "PE", "PI", "RJ", "RN", "RS", "RO",
+              "RR", "SC", "SE", "SP", "TO")
+
+
+def _total_regions(table: MappingProxyType) -> int:
+    """Get the highest region number cited by a TRF/TRT table.
+
+    :param table: Table with names like 'Tribunal Regional ... da 2a Região'
+    :type table: MappingProxyType
+    :return: Highest region number
+    :rtype: int
+    """
+    return max(int(re.search(r"(\d+)", court_name).group(1)) for court_name in table.values())
+
+
+def _build_court_codes() -> MappingProxyType:
+    """Build the (segment, region) -> court mapping used by dispatch_court.
+
+    :return: Read-only mapping like {("8", "26"): "TJSP", ("4", "01"): "TRF01"}
+    :rtype: MappingProxyType
+    """
+    court_codes = dict()
+    for region, state_abbr in enumerate(TJ_REGIONS, start=1):
+        if state_abbr not in TJ:
+            raise ValueError(f"{state_abbr} missing on court_state_relation.json TJ table")
+        court_codes[("8", str(region).zfill(2))] = f"TJ{state_abbr}"
+    for region in range(1, _total_regions(TRF) + 1):
+        court_codes[("4", str(region).zfill(2))] = f"TRF{str(region).zfill(2)}"
+    for region in range(1, _total_regions(TRT) + 1):
+        court_codes[("5", str(region).zfill(2))] = f"TRT{str(region).zfill(2)}"
+    return MappingProxyType(court_codes)
+
+
+COURT_CODES = _build_court_codes()
+SEGMENT_REGIONS = MappingProxyType({
+    segment: tuple(region for seg, region in COURT_CODES if seg == segment)
+    for segment in ("4", "5", "8")
+})
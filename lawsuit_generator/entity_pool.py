@@ -0,0 +1,98 @@
+from itertools import accumulate
+
+
+def zipf_cum_weights(size: int, skew: float) -> list:
+    """Cumulative Zipf weights, rank r gets 1 / r ** skew.
+
+    :param size: Total of ranks
+    :type size: int
+    :param skew: Zipf exponent, 0 is uniform, bigger is more skewed
+    :type skew: float
+    :return: Cumulative weights for random.choices
+    :rtype: list
+    """
+    return list(accumulate(1 / rank ** skew for rank in range(1, size + 1)))
+
+
+class EntityPool():
+    def __init__(self, fake, persons: int=10000, companies: int=2500, lawyers: int=1000,
+                 skew: float=1.1):
+        """Pre-generated persons, companies and lawyers shared by lawsuits.
+
+        Entities are created once with Faker and sampled with a Zipf skew, so
+        a few lawyers and companies show up in many lawsuits and most only in
+        a few, like in real court data. Documents are unique inside the pool.
+
+        :param fake: Faker instance used to fill the pool and to sample it
+        :type fake: Faker
+        :param persons: Total of persons (name, CPF, RG), defaults to 10000
+        :type persons: int, optional
+        :param companies: Total of companies (name, CNPJ), defaults to 2500
+        :type companies: int, optional
+        :param lawyers: Total of lawyers (name, OAB), defaults to 1000
+        :type lawyers: int, optional
+        :param skew: Zipf exponent of the sampling, defaults to 1.1
+        :type skew: float, optional
+        :raises ValueError: If a pool size is smaller than 1
+        """
+        if min(persons, companies, lawyers) < 1:
+            raise ValueError("pool sizes must be greater than zero")
+        self.fake = fake
+        self.skew = skew
+        self.persons = self._fill(lambda: (fake.name(), fake.cpf(),
+                                           "%s%s.%s%s%s.%s%s%s-%s" % tuple(fake.rg())),
+                                  persons)
+        self.companies = self._fill(lambda: (fake.company(), fake.cnpj()), companies)
+        self.lawyers = self._fill(lambda: (fake.name(), fake.state_abbr()
+                                           + str(fake.random_number(digits=6, fix_len=True))),
+                                  lawyers)
+        self._cum_weights = {size: zipf_cum_weights(size, skew)
+                             for size in {persons, companies, lawyers}}
+
+    @staticmethod
+    def _fill(generator, size: int) -> tuple:
+        #NOTE Keyed by document, a repeated document would merge two entities
+        entities = dict()
+        attempts = 0
+        while len(entities) < size and attempts < size * 10:
+            entity = generator()
+            entities.setdefault(entity[1], entity)
+            attempts += 1
+        return tuple(entities.values())
+
+    def _sample(self, entities: tuple):
+        cum_weights = self._cum_weights.get(len(entities))
+        if cum_weights is None:
+            cum_weights = self._cum_weights[len(entities)] = zipf_cum_weights(len(entities),
+                                                                              self.skew)
+        return self.fake.random.choices(entities, cum_weights=cum_weights)[0]
+
+    def person(self) -> tuple:
+        """Sample a person.
+
+        :return: (name, CPF, RG)
+        :rtype: tuple
+        """
+        return self._sample(self.persons)
+
+    def company(self) -> tuple:
+        """Sample a company.
+
+        :return: (name, CNPJ)
+        :rtype: tuple
+        """
+        return self._sample(self.companies)
+
+    def lawyer(self) -> tuple:
+        """Sample a lawyer.
+
+        :return: (name, OAB document, like "SP123456")
+        :rtype: tuple
+        """
+        return self._sample(self.lawyers)
+
+    def stats(self) -> dict:
+        """Total of entities of each kind."""
+        return {"persons": len(self.persons),
+                "companies": len(self.companies),
+                "lawyers": len(self.lawyers)}
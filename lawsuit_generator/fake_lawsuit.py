@@ -1,3 +1,27 @@
+from array import array
+import heapq
+import json
+import tempfile
+import zlib
+
+
+def classification_reference(classification: dict, event_index: int) -> dict:
+    """Classification pointing to its event by index instead of holding it.
+
+    :param classification: Classification with the full evento_obj
+    :type classification: dict
+    :param event_index: Position of the event on its list
+    :type event_index: int
+    :return: Classification with evento_index in place of evento_obj
+    :rtype: dict
+    """
+    return {"evento_index": event_index,
+            "tipo_evento": classification["tipo_evento"],
+            "classificacao": classification["classificacao"],
+            "ativo": classification["ativo"],
+            "match": classification["match"]}
+
+
 class FakeLawsuit():
     def __init__(self, **kwargs):
         self.lawsuit_number = kwargs["lawsuit_number"]
@@ -20,12 +44,15 @@ class FakeLawsuit():
         self.is_dependent = kwargs.get("is_dependent", False)
 
         #EVENTS
-        self.petition_list = kwargs.get("petition", [])
-        self.audition_list = kwargs.get("audition", [])
-        self.progress_list = kwargs.get("progress", [])
-        self.appendix_list = kwargs.get("appendix", [])
-        self.publication_list = kwargs.get("publication", [])
-        self.classification_list = kwargs.get("classification", [])
+        #NOTE With an events_loader, event lists are only generated on first access
+        self._events_loader = kwargs.get("events_loader", None)
+        self._event_counts = kwargs.get("event_counts", None)
+        self._petition_list = kwargs.get("petition", [])
+        self._audition_list = kwargs.get("audition", [])
+        self._progress_list = kwargs.get("progress", [])
+        self._appendix_list = kwargs.get("appendix", [])
+        self._publication_list = kwargs.get("publication", [])
+        self._classification_list = kwargs.get("classification", [])
 
         #PARTS AND LAWYERS
         self.part_active_list = kwargs.get("part_active", [])
@@ -35,7 +62,111 @@ class FakeLawsuit():
         self.part_other_list = kwargs.get("part_other", [])
 
 
-    def to_json(self):
+    @property
+    def events_loaded(self) -> bool:
+        """If the event lists were already generated."""
+        return self._events_loader is None
+
+    @property
+    def event_counts(self) -> dict:
+        """Total of events per list, known without generating lazy events."""
+        if self._event_counts is not None:
+            return dict(self._event_counts)
+        return {"publication": len(self._publication_list),
+                "progress": len(self._progress_list),
+                "appendix": len(self._appendix_list),
+                "petition": len(self._petition_list),
+                "audition": len(self._audition_list)}
+
+    #NOTE Event lists of lazy lawsuits are generated on first access, see load_events
+    @property
+    def petition_list(self) -> list:
+        self.load_events()
+        return self._petition_list
+
+    @petition_list.setter
+    def petition_list(self, value: list):
+        self.load_events()
+        self._petition_list = value
+
+    @property
+    def audition_list(self) -> list:
+        self.load_events()
+        return self._audition_list
+
+    @audition_list.setter
+    def audition_list(self, value: list):
+        self.load_events()
+        self._audition_list = value
+
+    @property
+    def progress_list(self) -> list:
+        self.load_events()
+        return self._progress_list
+
+    @progress_list.setter
+    def progress_list(self, value: list):
+        self.load_events()
+        self._progress_list = value
+
+    @property
+    def appendix_list(self) -> list:
+        self.load_events()
+        return self._appendix_list
+
+    @appendix_list.setter
+    def appendix_list(self, value: list):
+        self.load_events()
+        self._appendix_list = value
+
+    @property
+    def publication_list(self) -> list:
+        self.load_events()
+        return self._publication_list
+
+    @publication_list.setter
+    def publication_list(self, value: list):
+        self.load_events()
+        self._publication_list = value
+
+    @property
+    def classification_list(self) -> list:
+        self.load_events()
+        return self._classification_list
+
+    @classification_list.setter
+    def classification_list(self, value: list):
+        self.load_events()
+        self._classification_list = value
+
+    def load_events(self):
+        """Generate the lazy event lists, if not generated yet."""
+        if self._events_loader is None:
+            return
+        events = self._events_loader()
+        self._events_loader = None
+        self._petition_list = events["petition"]
+        self._audition_list = events["audition"]
+        self._progress_list = events["progress"]
+        self._appendix_list = events["appendix"]
+        self._publication_list = events["publication"]
+        self._classification_list = events["classification"]
+
+    def __getstate__(self):
+        #NOTE The loader holds the factory, send the generated events instead
+        self.load_events()
+        return self.__dict__
+
+    def to_json(self, classification_refs: bool=False):
+        """Lawsuit as a dict.
+
+        :param classification_refs: Classifications point to their
+            publication by evento_index instead of repeating it as
+            evento_obj, defaults to False
+        :type classification_refs: bool, optional
+        :return: Lawsuit dict
+        :rtype: dict
+        """
         json_obj = {
             "lawsuit_number": self.lawsuit_number,
             "year": self.year,
@@ -64,8 +195,18 @@ class FakeLawsuit():
             "part_other_list": self.part_other_list,
             "classification_list": self.classification_list,
         }
+        if classification_refs:
+            positions = {id(publication): position
+                         for position, publication in enumerate(self.publication_list)}
+            json_obj["classification_list"] = [
+                classification_reference(classification, positions[id(classification["evento_obj"])])
+                for classification in self.classification_list]
         return json_obj
 
+    def iter_timeline(self):
+        """See iter_timeline."""
+        return iter_timeline(self)
+
 
 class FakeFolder():
     def __init__(self, **kwargs):
@@ -78,19 +219,433 @@ class FakeFolder():
         self.attached_list = kwargs.get("attached", [])
         self.dependent_list = kwargs.get("dependent", [])
 
-    def to_json(self):
+    def to_json(self, classification_refs: bool=False):
         json_obj = {
             "main_number": self.main_number,
             "book_name": self.book_name,
             "court_house": self.court_house
         }
 
-        json_obj["main"] = self.main_lawsuit.to_json()
-        json_obj["appeals"] = [x.to_json() for x in self.appeals_list]
-        json_obj["recourses"] = [x.to_json() for x in self.recourses_list]
-        json_obj["attached"] = [x.to_json() for x in self.attached_list]
-        json_obj["dependents"] = [x.to_json() for x in self.dependent_list]
+        json_obj["main"] = self.main_lawsuit.to_json(classification_refs)
+        json_obj["appeals"] = [x.to_json(classification_refs) for x in self.appeals_list]
+        json_obj["recourses"] = [x.to_json(classification_refs) for x in self.recourses_list]
+        json_obj["attached"] = [x.to_json(classification_refs) for x in self.attached_list]
+        json_obj["dependents"] = [x.to_json(classification_refs) for x in self.dependent_list]
+
+        return json_obj
+
+        
+
+
+EVENT_LISTS = ("petition_list", "audition_list", "progress_list", "appendix_list",
+               "publication_list")
+PART_LISTS = ("part_active_list", "part_active_lawyer_list", "part_passive_list",
+              "part_passive_lawyer_list", "part_other_list")
+LAWSUIT_FIELDS = ("lawsuit_number", "year", "segment", "region", "origin", "court_house",
+                  "status", "instance", "is_secret", "header", "is_main", "is_appeal",
+                  "is_recourse", "is_attached", "is_dependent")
+
+#NOTE Event list to the field holding its "%Y-%m-%d" date
+EVENT_DATE_FIELDS = {"progress_list": "data_movimentacao",
+                     "publication_list": "data_publicacao",
+                     "appendix_list": "data_documento",
+                     "petition_list": "data_peticao",
+                     "audition_list": "data_audiencia"}
+
+
+def iter_timeline(lawsuit):
+    """Merged view of all event lists of a lawsuit, ordered by date.
+
+    Lists generated with LawsuitFactory(ordered_timeline=True) are already
+    sorted, so they are only merged, never sorted again.
+
+    :param lawsuit: Lawsuit with ordered event lists
+    :type lawsuit: FakeLawsuit | CompactLawsuit
+    :return: (date, event list name, event) tuples, oldest first
+    :rtype: generator
+    """
+    def dated(list_name):
+        date_field = EVENT_DATE_FIELDS[list_name]
+        return ((event[date_field], list_name, event) for event in getattr(lawsuit, list_name))
+    return heapq.merge(*(dated(list_name) for list_name in EVENT_DATE_FIELDS),
+                       key=lambda timeline_item: timeline_item[0])
+
+
+#NOTE One shared encoder, json.dumps(ensure_ascii=False) builds a new one per call
+JSON_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+#NOTE Packed lists shorter than this are kept as plain UTF-8, zlib would not pay off
+COMPRESS_MIN_BYTES = 256
+COMPRESS_LEVEL = 1
+EMPTY_PACKED_LIST = (b"", array("I", [2]))
+
+
+def pack_items(items: list) -> tuple:
+    """Pack the JSON texts of a list as one blob.
+
+    The texts are joined with ", ", like inside a JSON array, and the blob
+    is zlib compressed when it is long enough.
+
+    :param items: JSON text of every item
+    :type items: list
+    :return: (blob, offsets), offsets are the start of every item in the
+        joined text plus its length + 2
+    :rtype: tuple
+    """
+    if not items:
+        return EMPTY_PACKED_LIST
+    offsets = array("I", [0])
+    for item in items:
+        offsets.append(offsets[-1] + len(item) + 2)
+    data = ", ".join(items).encode("utf-8")
+    if len(data) >= COMPRESS_MIN_BYTES:
+        data = zlib.compress(data, COMPRESS_LEVEL)
+    return data, offsets
+
+
+def unpack_text(packed: tuple) -> str:
+    """Joined JSON text of a list packed by pack_items.
+
+    :param packed: (blob, offsets)
+    :type packed: tuple
+    :return: Items joined with ", "
+    :rtype: str
+    """
+    data = packed[0]
+    #NOTE Compressed blobs start with the zlib header, "x", JSON items never do
+    if data[:1] == b"x":
+        data = zlib.decompress(data)
+    return data.decode("utf-8")
+
+
+def unpack_items(packed: tuple, text: str=None) -> list:
+    """JSON text of every item of a list packed by pack_items.
+
+    :param packed: (blob, offsets)
+    :type packed: tuple
+    :param text: unpack_text(packed), if already unpacked, defaults to None
+    :type text: str, optional
+    :return: JSON texts
+    :rtype: list
+    """
+    if text is None:
+        text = unpack_text(packed)
+    offsets = packed[1]
+    return [text[offsets[position]:offsets[position + 1] - 2]
+            for position in range(len(offsets) - 1)]
+
+
+class CompactLawsuit():
+    __slots__ = LAWSUIT_FIELDS + ("encoded_lists", "classification_refs")
+
+    def __init__(self, **kwargs):
+        """Memory compact FakeLawsuit that serializes without building dicts.
+
+        Every event and part list is kept as one JSON text blob, encoded and
+        zlib compressed once when the lawsuit is built (see pack_items), and
+        classifications are (publication index, tipo_evento, classificacao,
+        ativo, inicio, fim, termo) tuples instead of holding the publication.
+        The FakeLawsuit list attributes are still available, decoded on access.
+        """
+        for field in LAWSUIT_FIELDS:
+            setattr(self, field, kwargs.get(field))
+        self.encoded_lists = kwargs["encoded_lists"]
+        self.classification_refs = kwargs.get("classification_refs", [])
 
+    @classmethod
+    def from_lawsuit(cls, lawsuit: FakeLawsuit):
+        """Build a compact copy of a FakeLawsuit.
+
+        :param lawsuit: Lawsuit to copy
+        :type lawsuit: FakeLawsuit
+        :return: Compact lawsuit
+        :rtype: CompactLawsuit
+        """
+        encode = JSON_ENCODER.encode
+        fields = {field: getattr(lawsuit, field) for field in LAWSUIT_FIELDS}
+        fields["encoded_lists"] = {list_name: pack_items([encode(item) for item in getattr(lawsuit, list_name)])
+                                   for list_name in EVENT_LISTS + PART_LISTS}
+        publication_positions = {id(publication): position
+                                 for position, publication in enumerate(lawsuit.publication_list)}
+        fields["classification_refs"] = [
+            (publication_positions[id(classification["evento_obj"])],
+             classification["tipo_evento"], classification["classificacao"],
+             classification["ativo"], classification["match"]["inicio"],
+             classification["match"]["fim"], classification["match"]["termo"])
+            for classification in lawsuit.classification_list]
+        return cls(**fields)
+
+    @property
+    def event_counts(self) -> dict:
+        """Total of events per list, see FakeLawsuit.event_counts."""
+        return {list_name[:-len("_list")]: len(self.encoded_lists[list_name][1]) - 1
+                for list_name in EVENT_LISTS}
+
+    def _decoded(self, list_name: str) -> list:
+        return json.loads("[" + unpack_text(self.encoded_lists[list_name]) + "]")
+
+    @property
+    def petition_list(self) -> list:
+        return self._decoded("petition_list")
+
+    @property
+    def audition_list(self) -> list:
+        return self._decoded("audition_list")
+
+    @property
+    def progress_list(self) -> list:
+        return self._decoded("progress_list")
+
+    @property
+    def appendix_list(self) -> list:
+        return self._decoded("appendix_list")
+
+    @property
+    def publication_list(self) -> list:
+        return self._decoded("publication_list")
+
+    @property
+    def part_active_list(self) -> list:
+        return self._decoded("part_active_list")
+
+    @property
+    def part_active_lawyer_list(self) -> list:
+        return self._decoded("part_active_lawyer_list")
+
+    @property
+    def part_passive_list(self) -> list:
+        return self._decoded("part_passive_list")
+
+    @property
+    def part_passive_lawyer_list(self) -> list:
+        return self._decoded("part_passive_lawyer_list")
+
+    @property
+    def part_other_list(self) -> list:
+        return self._decoded("part_other_list")
+
+    @property
+    def classification_list(self) -> list:
+        return self._classifications(self.publication_list)
+
+    def _classifications(self, publications: list, classification_refs: bool=False) -> list:
+        if classification_refs:
+            return [{"evento_index": position,
+                     "tipo_evento": event_type,
+                     "classificacao": name,
+                     "ativo": active,
+                     "match": {"inicio": start, "fim": end, "termo": term}}
+                    for position, event_type, name, active, start, end, term in self.classification_refs]
+        return [{"evento_obj": publications[position],
+                 "tipo_evento": event_type,
+                 "classificacao": name,
+                 "ativo": active,
+                 "match": {"inicio": start, "fim": end, "termo": term}}
+                for position, event_type, name, active, start, end, term in self.classification_refs]
+
+    def to_json(self, classification_refs: bool=False) -> dict:
+        """Same dict as FakeLawsuit.to_json, decoded on demand."""
+        json_obj = {field: getattr(self, field) for field in LAWSUIT_FIELDS}
+        for list_name in EVENT_LISTS + PART_LISTS:
+            json_obj[list_name] = getattr(self, list_name)
+        json_obj["classification_list"] = self._classifications(json_obj["publication_list"],
+                                                                classification_refs)
         return json_obj
 
-        
\ No newline at end of file
+    def encode(self, classification_refs: bool=False) -> str:
+        """JSON text equal to json.dumps(self.to_json(classification_refs),
+        ensure_ascii=False), joined from the encoded events without building
+        any dict.
+
+        :param classification_refs: See FakeLawsuit.to_json, defaults to False
+        :type classification_refs: bool, optional
+        :return: JSON text
+        :rtype: str
+        """
+        encode = JSON_ENCODER.encode
+        chunks = [f"\"{field}\": {encode(getattr(self, field))}" for field in LAWSUIT_FIELDS]
+        texts = {list_name: unpack_text(self.encoded_lists[list_name])
+                 for list_name in EVENT_LISTS + PART_LISTS}
+        chunks.extend(f"\"{list_name}\": [{text}]" for list_name, text in texts.items())
+        if classification_refs:
+            event_key = "\"evento_index\": "
+            publications = range(len(self.encoded_lists["publication_list"][1]) - 1)
+        else:
+            event_key = "\"evento_obj\": "
+            publications = list()
+            if self.classification_refs:
+                publications = unpack_items(self.encoded_lists["publication_list"],
+                                            texts["publication_list"])
+        classifications = [
+            f"{{{event_key}{publications[position]}, \"tipo_evento\": {encode(event_type)}, "
+            f"\"classificacao\": {encode(name)}, \"ativo\": {encode(active)}, "
+            f"\"match\": {{\"inicio\": {start}, \"fim\": {end}, \"termo\": {encode(term)}}}}}"
+            for position, event_type, name, active, start, end, term in self.classification_refs]
+        chunks.append(f"\"classification_list\": [{', '.join(classifications)}]")
+        return "{" + ", ".join(chunks) + "}"
+
+    def to_bytes(self, classification_refs: bool=False) -> bytes:
+        """UTF-8 encoded JSON, see encode."""
+        return self.encode(classification_refs).encode("utf-8")
+
+    def iter_timeline(self):
+        """See iter_timeline."""
+        return iter_timeline(self)
+
+
+class CompactFolder():
+    __slots__ = ("main_number", "book_name", "court_house", "main_lawsuit",
+                 "appeals_list", "recourses_list", "attached_list", "dependent_list")
+
+    def __init__(self, **kwargs):
+        """Memory compact FakeFolder, holding CompactLawsuit objects."""
+        self.main_number = kwargs["main_number"]
+        self.book_name = kwargs["book_name"]
+        self.court_house = kwargs["court_house"]
+        self.main_lawsuit = kwargs["main"]
+        self.appeals_list = kwargs.get("appeals", [])
+        self.recourses_list = kwargs.get("recourses", [])
+        self.attached_list = kwargs.get("attached", [])
+        self.dependent_list = kwargs.get("dependent", [])
+
+    @classmethod
+    def from_folder(cls, folder: FakeFolder):
+        """Build a compact copy of a FakeFolder.
+
+        :param folder: Folder to copy, its lawsuits may already be compact
+        :type folder: FakeFolder
+        :return: Compact folder
+        :rtype: CompactFolder
+        """
+        def compact(lawsuit):
+            if isinstance(lawsuit, CompactLawsuit):
+                return lawsuit
+            return CompactLawsuit.from_lawsuit(lawsuit)
+        return cls(main_number=folder.main_number,
+                   book_name=folder.book_name,
+                   court_house=folder.court_house,
+                   main=compact(folder.main_lawsuit),
+                   appeals=[compact(x) for x in folder.appeals_list],
+                   recourses=[compact(x) for x in folder.recourses_list],
+                   attached=[compact(x) for x in folder.attached_list],
+                   dependent=[compact(x) for x in folder.dependent_list])
+
+    def to_json(self, classification_refs: bool=False) -> dict:
+        """Same dict as FakeFolder.to_json, decoded on demand."""
+        return FakeFolder.to_json(self, classification_refs)
+
+    def encode(self, classification_refs: bool=False) -> str:
+        """JSON text equal to json.dumps(self.to_json(classification_refs),
+        ensure_ascii=False).
+
+        :param classification_refs: See FakeLawsuit.to_json, defaults to False
+        :type classification_refs: bool, optional
+        :return: JSON text
+        :rtype: str
+        """
+        encode = JSON_ENCODER.encode
+
+        def encode_lawsuits(lawsuits):
+            return "[" + ", ".join(lawsuit.encode(classification_refs) for lawsuit in lawsuits) + "]"
+        return (f"{{\"main_number\": {encode(self.main_number)}, "
+                f"\"book_name\": {encode(self.book_name)}, "
+                f"\"court_house\": {encode(self.court_house)}, "
+                f"\"main\": {self.main_lawsuit.encode(classification_refs)}, "
+                f"\"appeals\": {encode_lawsuits(self.appeals_list)}, "
+                f"\"recourses\": {encode_lawsuits(self.recourses_list)}, "
+                f"\"attached\": {encode_lawsuits(self.attached_list)}, "
+                f"\"dependents\": {encode_lawsuits(self.dependent_list)}}}")
+
+    def to_bytes(self, classification_refs: bool=False) -> bytes:
+        """UTF-8 encoded JSON, see encode."""
+        return self.encode(classification_refs).encode("utf-8")
+
+
+class StreamingLawsuit():
+    def __init__(self, **kwargs):
+        """Lawsuit with events produced by iterators while it is written.
+
+        Used for giant lawsuits: only number, header and parts are held in
+        memory, see LawsuitFactory.generate_streaming_lawsuit.
+        """
+        for field in LAWSUIT_FIELDS:
+            setattr(self, field, kwargs.get(field))
+        self.is_main = kwargs.get("is_main", True)
+        self.is_appeal = kwargs.get("is_appeal", False)
+        self.is_recourse = kwargs.get("is_recourse", False)
+        self.is_attached = kwargs.get("is_attached", False)
+        self.is_dependent = kwargs.get("is_dependent", False)
+        self.event_counts = kwargs["event_counts"]
+        self.event_iterators = kwargs["event_iterators"]
+        self.classify = kwargs.get("classify", None)
+        for part_list in PART_LISTS:
+            setattr(self, part_list, kwargs.get(part_list[:-len("_list")], []))
+
+    def iter_chunks(self, spool_size: int=1 << 20, classification_refs: bool=False):
+        """Produce the lawsuit JSON text piece by piece.
+
+        The text has the same layout as json.dumps(FakeLawsuit.to_json()).
+        Classifications are made while the publications are produced and
+        spooled to a temporary file, which only uses disk past spool_size.
+
+        :param spool_size: Classification bytes kept in memory, defaults to 1MiB
+        :type spool_size: int, optional
+        :param classification_refs: See FakeLawsuit.to_json, defaults to False
+        :type classification_refs: bool, optional
+        :return: JSON text chunks
+        :rtype: generator
+        """
+        encode = JSON_ENCODER.encode
+        yield "{" + ", ".join(f"\"{field}\": {encode(getattr(self, field))}"
+                              for field in LAWSUIT_FIELDS)
+        with tempfile.SpooledTemporaryFile(max_size=spool_size, mode="w+",
+                                           encoding="utf-8") as classifications:
+            total_classifications = 0
+            for list_name in EVENT_LISTS:
+                yield f", \"{list_name}\": ["
+                for position, event in enumerate(self.event_iterators[list_name]()):
+                    encoded_event = encode(event)
+                    yield (", " if position else "") + encoded_event
+                    if list_name != "publication_list" or self.classify is None:
+                        continue
+                    classification = self.classify(event)
+                    if classification is None:
+                        continue
+                    match = classification["match"]
+                    if classification_refs:
+                        event_ref = f"\"evento_index\": {position}"
+                    else:
+                        event_ref = f"\"evento_obj\": {encoded_event}"
+                    classifications.write(
+                        (", " if total_classifications else "")
+                        + f"{{{event_ref}, "
+                        f"\"tipo_evento\": {encode(classification['tipo_evento'])}, "
+                        f"\"classificacao\": {encode(classification['classificacao'])}, "
+                        f"\"ativo\": {encode(classification['ativo'])}, "
+                        f"\"match\": {encode(match)}}}")
+                    total_classifications += 1
+                yield "]"
+            for part_list in PART_LISTS:
+                yield f", \"{part_list}\": {encode(getattr(self, part_list))}"
+            yield ", \"classification_list\": ["
+            classifications.seek(0)
+            for chunk in iter(lambda: classifications.read(1 << 16), ""):
+                yield chunk
+            yield "]}"
+
+    def write_json(self, output_file, classification_refs: bool=False) -> int:
+        """Write the lawsuit JSON to a binary file object.
+
+        :param output_file: File opened in binary mode
+        :type output_file: file
+        :param classification_refs: See FakeLawsuit.to_json, defaults to False
+        :type classification_refs: bool, optional
+        :return: Bytes written
+        :rtype: int
+        """
+        total_bytes = 0
+        for chunk in self.iter_chunks(classification_refs=classification_refs):
+            data = chunk.encode("utf-8")
+            output_file.write(data)
+            total_bytes += len(data)
+        return total_bytes
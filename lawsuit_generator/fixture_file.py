@@ -0,0 +1,294 @@
+import hashlib
+import json
+import mmap
+import struct
+import zlib
+from array import array
+
+MAGIC = b"LGFX"
+VERSION = 1
+COMPRESSIONS = {None: 0, "zlib": 1}
+
+#NOTE magic, version, compression, folders, lawsuits, folder table offset,
+# lawsuit table offset, hash table offset, hash slots
+FOOTER = struct.Struct("<4sHHQQQQQQ")
+#NOTE meta offset, meta length, first lawsuit, appeals, recourses, attached, dependents
+FOLDER_ENTRY = struct.Struct("<QIQIIII")
+#NOTE lawsuit offset, lawsuit length
+LAWSUIT_ENTRY = struct.Struct("<QI")
+#NOTE lawsuit_number hash, lawsuit position + 1 (0 is an empty slot)
+HASH_SLOT = struct.Struct("<QQ")
+
+FOLDER_META_FIELDS = ("main_number", "book_name", "court_house")
+FOLDER_LISTS = (("appeals", "appeals_list"), ("recourses", "recourses_list"),
+                ("attached", "attached_list"), ("dependents", "dependent_list"))
+
+
+def number_hash(lawsuit_number: str) -> int:
+    """Stable 64 bits hash of a lawsuit number, same on every process."""
+    return int.from_bytes(hashlib.blake2b(lawsuit_number.encode("utf-8"), digest_size=8).digest(),
+                          "little")
+
+
+def _encode(obj) -> bytes:
+    if hasattr(obj, "to_bytes"):
+        return obj.to_bytes()
+    if hasattr(obj, "to_json"):
+        obj = obj.to_json()
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+class FixtureWriter():
+    def __init__(self, path: str, compression: str=None):
+        """Binary container of generated folders with a trailing offset index.
+
+        Every lawsuit is stored as its own JSON record, folders keep only
+        their main_number, book_name and court_house plus the position of
+        their lawsuits. After the records come a folder table, a lawsuit
+        table and an open addressing hash table of lawsuit numbers, all with
+        fixed size entries, and a footer pointing to them, so FixtureReader
+        finds folder k or a lawsuit_number with a few reads.
+
+        :param path: Output file path
+        :type path: str
+        :param compression: None or "zlib" (per record), defaults to None
+        :type compression: str, optional
+        :raises ValueError: If compression is not supported
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {tuple(COMPRESSIONS)}")
+        self.path = path
+        self.compression = compression
+        self._file = open(path, "wb")
+        self._offset = 0
+        self._folder_table = bytearray()
+        self._lawsuit_table = bytearray()
+        self._number_hashes = array("Q")
+        self.total_folders = 0
+        self.total_lawsuits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_record(self, data: bytes) -> tuple:
+        if self.compression == "zlib":
+            data = zlib.compress(data)
+        offset = self._offset
+        self._file.write(data)
+        self._offset += len(data)
+        return offset, len(data)
+
+    def _write_lawsuit(self, lawsuit):
+        number = lawsuit["lawsuit_number"] if isinstance(lawsuit, dict) else lawsuit.lawsuit_number
+        self._lawsuit_table += LAWSUIT_ENTRY.pack(*self._write_record(_encode(lawsuit)))
+        self._number_hashes.append(number_hash(number))
+        self.total_lawsuits += 1
+
+    def write(self, folder):
+        """Write a folder and all its lawsuits.
+
+        :param folder: FakeFolder, CompactFolder or a to_json() dict
+        :type folder: FakeFolder | CompactFolder | dict
+        """
+        if isinstance(folder, dict):
+            meta = {field: folder[field] for field in FOLDER_META_FIELDS}
+            main = folder["main"]
+            lawsuit_lists = [folder[key] for key, _ in FOLDER_LISTS]
+        else:
+            meta = {field: getattr(folder, field) for field in FOLDER_META_FIELDS}
+            main = folder.main_lawsuit
+            lawsuit_lists = [getattr(folder, attribute) for _, attribute in FOLDER_LISTS]
+        meta_offset, meta_length = self._write_record(_encode(meta))
+        first_lawsuit = self.total_lawsuits
+        self._write_lawsuit(main)
+        for lawsuit_list in lawsuit_lists:
+            for lawsuit in lawsuit_list:
+                self._write_lawsuit(lawsuit)
+        self._folder_table += FOLDER_ENTRY.pack(meta_offset, meta_length, first_lawsuit,
+                                                *(len(x) for x in lawsuit_lists))
+        self.total_folders += 1
+
+    def write_all(self, folders) -> int:
+        """Consume a folders iterable, like generate_multiple_folders.
+
+        :param folders: Iterable of folders
+        :type folders: iterable
+        :return: Total of folders written
+        :rtype: int
+        """
+        for folder in folders:
+            self.write(folder)
+        return self.total_folders
+
+    def close(self):
+        """Write the tables and the footer and close the file."""
+        if self._file is None:
+            return
+        folder_table_offset = self._offset
+        self._file.write(self._folder_table)
+        lawsuit_table_offset = folder_table_offset + len(self._folder_table)
+        self._file.write(self._lawsuit_table)
+        hash_table_offset = lawsuit_table_offset + len(self._lawsuit_table)
+        #NOTE At most half full, so probes stay short
+        slots = 1
+        while slots < 2 * max(self.total_lawsuits, 1):
+            slots *= 2
+        table = array("Q", bytes(16 * slots))
+        for position, key in enumerate(self._number_hashes):
+            slot = key & (slots - 1)
+            while table[2 * slot + 1]:
+                slot = (slot + 1) & (slots - 1)
+            table[2 * slot] = key
+            table[2 * slot + 1] = position + 1
+        self._file.write(table.tobytes())
+        self._file.write(FOOTER.pack(MAGIC, VERSION, COMPRESSIONS[self.compression],
+                                     self.total_folders, self.total_lawsuits,
+                                     folder_table_offset, lawsuit_table_offset,
+                                     hash_table_offset, slots))
+        self._file.close()
+        self._file = None
+
+
+def write_fixture(path: str, folders, **kwargs) -> int:
+    """Write folders to a fixture file, see FixtureWriter.
+
+    :param path: Output file path
+    :type path: str
+    :param folders: Iterable of folders
+    :type folders: iterable
+    :return: Total of folders written
+    :rtype: int
+    """
+    with FixtureWriter(path, **kwargs) as writer:
+        return writer.write_all(folders)
+
+
+class FixtureReader():
+    def __init__(self, path: str):
+        """Memory-mapped reader of FixtureWriter files.
+
+        Nothing is loaded up front: folders and lawsuits are sliced from the
+        mapping on demand, so any number of readers, threads or processes,
+        share the page cache. Readers are picklable (they reopen the file),
+        so they can be sent to multiprocessing workers.
+
+        :param path: Fixture file path
+        :type path: str
+        :raises ValueError: If the file is not a fixture file
+        """
+        self.path = path
+        with open(path, "rb") as fixture_file:
+            self._mmap = mmap.mmap(fixture_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < FOOTER.size:
+            raise ValueError(f"{path} is not a fixture file")
+        (magic, version, compression, self.total_folders, self.total_lawsuits,
+         self._folder_table, self._lawsuit_table, self._hash_table,
+         self._hash_slots) = FOOTER.unpack_from(self._mmap, len(self._mmap) - FOOTER.size)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} fixture file")
+        self.compressed = compression == COMPRESSIONS["zlib"]
+
+    def __len__(self) -> int:
+        return self.total_folders
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def _record(self, offset: int, length: int) -> bytes:
+        data = self._mmap[offset:offset + length]
+        return zlib.decompress(data) if self.compressed else data
+
+    def lawsuit_bytes_at(self, position: int) -> bytes:
+        """JSON of the lawsuit at a position of the file.
+
+        :param position: Lawsuit position, from 0 to total_lawsuits - 1
+        :type position: int
+        :raises IndexError: If position is out of range
+        :return: Lawsuit JSON
+        :rtype: bytes
+        """
+        if not 0 <= position < self.total_lawsuits:
+            raise IndexError("lawsuit position out of range")
+        offset, length = LAWSUIT_ENTRY.unpack_from(
+            self._mmap, self._lawsuit_table + position * LAWSUIT_ENTRY.size)
+        return self._record(offset, length)
+
+    def lawsuit_bytes(self, lawsuit_number: str) -> bytes:
+        """JSON of a lawsuit, found by its number.
+
+        :param lawsuit_number: Complete lawsuit number
+        :type lawsuit_number: str
+        :raises KeyError: If no lawsuit has this number
+        :return: Lawsuit JSON
+        :rtype: bytes
+        """
+        key = number_hash(lawsuit_number)
+        #NOTE Generated lawsuits start with their number, only records written
+        # with other layouts (or a hash collision) are parsed to check it
+        prefix = ("{\"lawsuit_number\": "
+                  + json.dumps(lawsuit_number, ensure_ascii=False)).encode("utf-8")
+        mask = self._hash_slots - 1
+        slot = key & mask
+        while True:
+            slot_key, position = HASH_SLOT.unpack_from(self._mmap,
+                                                       self._hash_table + slot * HASH_SLOT.size)
+            if not position:
+                raise KeyError(lawsuit_number)
+            if slot_key == key:
+                data = self.lawsuit_bytes_at(position - 1)
+                if data.startswith(prefix) or json.loads(data)["lawsuit_number"] == lawsuit_number:
+                    return data
+            slot = (slot + 1) & mask
+
+    def lawsuit(self, lawsuit_number: str) -> dict:
+        """Lawsuit dict, see lawsuit_bytes."""
+        return json.loads(self.lawsuit_bytes(lawsuit_number))
+
+    def folder_bytes(self, index: int) -> bytes:
+        """JSON of folder index, equal to the folder to_json() dumped with
+        json.dumps(..., ensure_ascii=False).
+
+        :param index: Folder position, negative counts from the end
+        :type index: int
+        :raises IndexError: If index is out of range
+        :return: Folder JSON
+        :rtype: bytes
+        """
+        if index < 0:
+            index += self.total_folders
+        if not 0 <= index < self.total_folders:
+            raise IndexError("folder index out of range")
+        meta_offset, meta_length, position, *list_sizes = FOLDER_ENTRY.unpack_from(
+            self._mmap, self._folder_table + index * FOLDER_ENTRY.size)
+        parts = [self._record(meta_offset, meta_length)[:-1], b', "main": ',
+                 self.lawsuit_bytes_at(position)]
+        position += 1
+        for (key, _), size in zip(FOLDER_LISTS, list_sizes):
+            lawsuits = [self.lawsuit_bytes_at(position + x) for x in range(size)]
+            position += size
+            parts += [b', "', key.encode(), b'": [', b", ".join(lawsuits), b"]"]
+        parts.append(b"}")
+        return b"".join(parts)
+
+    def folder(self, index: int) -> dict:
+        """Folder dict, see folder_bytes."""
+        return json.loads(self.folder_bytes(index))
+
+    def __getitem__(self, index: int) -> dict:
+        return self.folder(index)
+
+    def close(self):
+        """Release the mapping."""
+        self._mmap.close()
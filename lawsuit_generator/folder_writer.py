@@ -0,0 +1,159 @@
+import gzip
+import json
+
+COMPRESSIONS = (None, "gzip", "zstd")
+
+
+class FolderWriter():
+    def __init__(self, path: str, compression: str=None, compress_level: int=None,
+                 buffer_size: int=1 << 20, flush_every: int=1000,
+                 classification_refs: bool=False):
+        """Streaming JSON Lines writer for generated folders.
+
+        Each folder is encoded as soon as it is written, kept in a buffer of
+        at most buffer_size bytes and then sent to the file, so memory does
+        not grow with the number of folders written.
+
+        :param path: Output file path
+        :type path: str
+        :param compression: None, "gzip" or "zstd", defaults to None
+        :type compression: str, optional
+        :param compress_level: Compression level, defaults to the codec default
+        :type compress_level: int, optional
+        :param buffer_size: Max bytes buffered before writing, defaults to 1MiB
+        :type buffer_size: int, optional
+        :param flush_every: Flush the file every N folders, defaults to 1000
+        :type flush_every: int, optional
+        :param classification_refs: Write classifications with evento_index
+            instead of the whole publication, defaults to False
+        :type classification_refs: bool, optional
+        :raises ValueError: If compression is not supported
+        :raises ImportError: If zstd is asked and zstandard is not installed
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {COMPRESSIONS}")
+        self.path = path
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.flush_every = flush_every
+        self.classification_refs = classification_refs
+        self.total_folders = 0
+        self.total_bytes = 0
+        self._buffer = list()
+        self._buffered_bytes = 0
+        self._raw_file = None
+
+        if compression == "gzip":
+            level = 6 if compress_level is None else compress_level
+            self._file = gzip.open(path, "wb", compresslevel=level)
+        elif compression == "zstd":
+            try:
+                import zstandard
+            except ImportError as err:
+                raise ImportError("zstd compression needs the 'zstandard' package") from err
+            level = 3 if compress_level is None else compress_level
+            self._raw_file = open(path, "wb")
+            self._file = zstandard.ZstdCompressor(level=level).stream_writer(self._raw_file)
+        else:
+            self._file = open(path, "wb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, folder) -> int:
+        """Write a single folder as one JSON line.
+
+        :param folder: FakeFolder, CompactFolder or a to_json() dict
+        :type folder: FakeFolder | CompactFolder | dict
+        :return: Bytes of the encoded line
+        :rtype: int
+        """
+        if hasattr(folder, "to_bytes"):
+            line = folder.to_bytes(self.classification_refs) + b"\n"
+        else:
+            if hasattr(folder, "to_json"):
+                json_obj = folder.to_json(self.classification_refs)
+            else:
+                json_obj = folder
+            line = json.dumps(json_obj, ensure_ascii=False).encode("utf-8") + b"\n"
+        self._buffer.append(line)
+        self._buffered_bytes += len(line)
+        self.total_bytes += len(line)
+        self.total_folders += 1
+        if self._buffered_bytes >= self.buffer_size:
+            self._write_buffer()
+        if self.flush_every and self.total_folders % self.flush_every == 0:
+            self.flush()
+        return len(line)
+
+    def write_stream(self, streaming_obj) -> int:
+        """Write an object producing its JSON in chunks as one line, like a
+        StreamingLawsuit, without holding the whole line in memory.
+
+        :param streaming_obj: Object with an iter_chunks() method
+        :type streaming_obj: StreamingLawsuit
+        :return: Bytes of the written line
+        :rtype: int
+        """
+        self._write_buffer()
+        total_bytes = 0
+        for chunk in streaming_obj.iter_chunks(classification_refs=self.classification_refs):
+            data = chunk.encode("utf-8")
+            self._file.write(data)
+            total_bytes += len(data)
+        self._file.write(b"\n")
+        total_bytes += 1
+        self.total_bytes += total_bytes
+        self.total_folders += 1
+        self.flush()
+        return total_bytes
+
+    def write_all(self, folders) -> int:
+        """Consume a folders iterable, like generate_multiple_folders.
+
+        :param folders: Iterable of FakeFolder or dicts
+        :type folders: iterable
+        :return: Total of folders written
+        :rtype: int
+        """
+        for folder in folders:
+            self.write(folder)
+        return self.total_folders
+
+    def flush(self):
+        """Send buffered lines to the file and flush it."""
+        self._write_buffer()
+        self._file.flush()
+
+    def close(self):
+        """Flush pending data and close the file."""
+        if self._file is None:
+            return
+        self._write_buffer()
+        self._file.close()
+        if self._raw_file is not None and not self._raw_file.closed:
+            self._raw_file.close()
+        self._file = None
+
+    def _write_buffer(self):
+        if self._buffer:
+            self._file.write(b"".join(self._buffer))
+            self._buffer = list()
+            self._buffered_bytes = 0
+
+
+def write_folders(path: str, folders, **kwargs) -> int:
+    """Write folders to a JSON Lines file, see FolderWriter.
+
+    :param path: Output file path
+    :type path: str
+    :param folders: Iterable of FakeFolder or dicts
+    :type folders: iterable
+    :return: Total of folders written
+    :rtype: int
+    """
+    with FolderWriter(path, **kwargs) as writer:
+        return writer.write_all(folders)
@@ -0,0 +1,254 @@
+import json
+import random
+
+QUERY_KINDS = ("classification", "part", "lawyer")
+
+#NOTE kind, FakeLawsuit attribute
+NAME_LISTS = (("part", "part_active_list"), ("lawyer", "part_active_lawyer_list"),
+              ("part", "part_passive_list"), ("lawyer", "part_passive_lawyer_list"),
+              ("part", "part_other_list"))
+
+
+class GroundTruthIndex():
+    def __init__(self, publication_names: bool=True):
+        """Inverted index of what the generator put in each lawsuit, built
+        while folders are generated.
+
+        Terms are classification match terms, part names and lawyer names.
+        Each posting is (lawsuit_number, list name, position, start, end):
+        a classification points to its publication and match span, a name
+        to its part record (span of "nome") and, with publication_names, to
+        every publication where the generator wrote it, found from the
+        publication template without searching the text.
+
+        Classification hits are the annotated spans, a search engine may also
+        match the same text by chance elsewhere (mostly very short terms, see
+        sample_queries min_length). Name hits are complete, see hits.
+
+        :param publication_names: Also index names inside publications,
+            defaults to True
+        :type publication_names: bool, optional
+        """
+        self.publication_names = publication_names
+        self.terms = {kind: dict() for kind in QUERY_KINDS}
+        #NOTE Name token to the part and lawyer names holding it
+        self.name_tokens = dict()
+        self.total_postings = 0
+        self.total_lawsuits = 0
+
+    def _add(self, kind: str, term: str, posting: tuple):
+        postings = self.terms[kind].get(term)
+        if postings is None:
+            self.terms[kind][term] = [posting]
+            if kind != "classification":
+                for token in term.split():
+                    self.name_tokens.setdefault(token, set()).add(term)
+        else:
+            postings.append(posting)
+        self.total_postings += 1
+
+    def add_folder(self, folder):
+        """Index every lawsuit of a folder.
+
+        :param folder: Folder generated by LawsuitFactory
+        :type folder: FakeFolder | CompactFolder
+        """
+        for lawsuit in (folder.main_lawsuit, *folder.appeals_list, *folder.recourses_list,
+                        *folder.attached_list, *folder.dependent_list):
+            self.add_lawsuit(lawsuit)
+
+    def track(self, folders):
+        """Index folders as they pass, like generate_multiple_folders output.
+
+        :param folders: Iterable of folders
+        :type folders: iterable
+        :return: The same folders
+        :rtype: generator
+        """
+        for folder in folders:
+            self.add_folder(folder)
+            yield folder
+
+    def add_lawsuit(self, lawsuit):
+        """Index the classifications, parts and lawyers of a lawsuit.
+
+        :param lawsuit: Lawsuit generated by LawsuitFactory
+        :type lawsuit: FakeLawsuit | CompactLawsuit
+        """
+        self.total_lawsuits += 1
+        if lawsuit.is_secret:
+            return
+        number = lawsuit.lawsuit_number
+        lawsuit_json = lawsuit.to_json(classification_refs=True)
+        for classification in lawsuit_json["classification_list"]:
+            match = classification["match"]
+            if match["termo"]:
+                self._add("classification", match["termo"],
+                          (number, "publication_list", classification["evento_index"],
+                           match["inicio"], match["fim"]))
+        for kind, list_name in NAME_LISTS:
+            for position, part in enumerate(lawsuit_json[list_name]):
+                if part:
+                    self._add(kind, part["nome"], (number, list_name, position, 0,
+                                                   len(part["nome"])))
+        if self.publication_names and lawsuit_json["publication_list"]:
+            self._add_publication_names(lawsuit_json)
+
+    def _add_publication_names(self, lawsuit_json: dict):
+        """Names from the publication template of LawsuitFactory.iter_publication:
+        "{CLASS} - PROCESSO {number} - {parts} - {text} - adv: {lawyers}"."""
+        number = lawsuit_json["lawsuit_number"]
+        law_class = (lawsuit_json["header"] or {}).get("classe", "")
+        parts = [x["nome"] for x in lawsuit_json["part_active_list"]
+                 + lawsuit_json["part_passive_list"] if x]
+        lawyers = [x["nome"] for x in lawsuit_json["part_active_lawyer_list"]
+                   + lawsuit_json["part_passive_lawyer_list"] if x]
+        prefix = f"{law_class.upper()} - PROCESSO {number} - "
+        lawyers_text = " - ".join(lawyers)
+        for position, publication in enumerate(lawsuit_json["publication_list"]):
+            text = publication["publicacao"]
+            if not text.startswith(prefix) or not text.endswith(lawyers_text):
+                continue
+            start = len(prefix)
+            for name in parts:
+                if text.startswith(name, start):
+                    self._add("part", name, (number, "publication_list", position,
+                                             start, start + len(name)))
+                start += len(name) + 3
+            start = len(text) - len(lawyers_text)
+            for name in lawyers:
+                if text.startswith(name, start):
+                    self._add("lawyer", name, (number, "publication_list", position,
+                                               start, start + len(name)))
+                start += len(name) + 3
+
+    def _candidate_names(self, term: str) -> set:
+        """Names that may hold term, from name_tokens.
+
+        Inner tokens of term are whole name tokens, the first may be the end
+        of a token and the last the start of one.
+        """
+        tokens = term.split()
+        if not tokens:
+            return set(self.terms["part"]) | set(self.terms["lawyer"])
+        if len(tokens) > 2:
+            return min((self.name_tokens.get(token, set()) for token in tokens[1:-1]), key=len)
+
+        def holding(matches) -> set:
+            names = set()
+            for token, token_names in self.name_tokens.items():
+                if matches(token):
+                    names |= token_names
+            return names
+        if len(tokens) == 1:
+            return holding(lambda token: tokens[0] in token)
+        return holding(lambda token: token.endswith(tokens[0])) & \
+            holding(lambda token: token.startswith(tokens[-1]))
+
+    def _publication_hits(self, term: str) -> list:
+        #NOTE A name is also found inside longer names, "Eduardo Porto" in
+        # "Dr. Carlos Eduardo Porto", the postings of those are shifted
+        hits = list()
+        candidates = self._candidate_names(term)
+        for kind in ("part", "lawyer"):
+            for name in candidates:
+                postings = self.terms[kind].get(name)
+                if postings is None:
+                    continue
+                offsets = list()
+                offset = name.find(term)
+                while offset >= 0:
+                    offsets.append(offset)
+                    offset = name.find(term, offset + 1)
+                if not offsets:
+                    continue
+                for number, list_name, position, start, _ in postings:
+                    if list_name == "publication_list":
+                        hits.extend((number, list_name, position, start + offset,
+                                     start + offset + len(term)) for offset in offsets)
+        return sorted(hits)
+
+    def hits(self, kind: str, term: str) -> list:
+        """Expected postings of a query.
+
+        Classifications hit their annotated spans. Names hit the part records
+        with that exact name plus every place of a publication header where
+        the name was written, as a full text search would find them.
+
+        :param kind: One of QUERY_KINDS
+        :type kind: str
+        :param term: Query term
+        :type term: str
+        :return: (lawsuit_number, list name, position, start, end) postings
+        :rtype: list
+        """
+        if kind == "classification":
+            return list(self.terms[kind].get(term, ()))
+        records = [posting for posting in self.terms[kind].get(term, ())
+                   if posting[1] != "publication_list"]
+        return records + self._publication_hits(term)
+
+    def sample_queries(self, total: int, kinds: tuple=QUERY_KINDS, seed: int=0,
+                       min_length: int=8) -> list:
+        """Sample queries with their expected hits.
+
+        :param total: Total of queries, split evenly between kinds
+        :type total: int
+        :param kinds: Kinds sampled, defaults to QUERY_KINDS
+        :type kinds: tuple, optional
+        :param seed: Sampling seed, defaults to 0
+        :type seed: int, optional
+        :param min_length: Shortest term sampled, defaults to 8
+        :type min_length: int, optional
+        :return: Dicts with kind, query and hits
+        :rtype: list
+        """
+        rnd = random.Random(seed)
+        candidates = {kind: sorted(term for term in self.terms[kind] if len(term) >= min_length)
+                      for kind in kinds}
+        kinds = [kind for kind in kinds if candidates[kind]]
+        queries = list()
+        for number in range(total if kinds else 0):
+            kind = kinds[number % len(kinds)]
+            term = rnd.choice(candidates[kind])
+            queries.append({"kind": kind, "query": term, "hits": self.hits(kind, term)})
+        return queries
+
+    def export_queries(self, path: str, total: int, **kwargs) -> int:
+        """Write sample_queries as JSON lines.
+
+        :param path: Output file path
+        :type path: str
+        :param total: Total of queries
+        :type total: int
+        :return: Total of queries written
+        :rtype: int
+        """
+        queries = self.sample_queries(total, **kwargs)
+        with open(path, "w", encoding="utf-8") as output_file:
+            for query in queries:
+                output_file.write(json.dumps(query, ensure_ascii=False) + "\n")
+        return len(queries)
+
+    def export_index(self, path: str) -> int:
+        """Write the whole index as JSON lines of kind, term and hits.
+
+        :param path: Output file path
+        :type path: str
+        :return: Total of terms written
+        :rtype: int
+        """
+        total = 0
+        with open(path, "w", encoding="utf-8") as output_file:
+            for kind, terms in self.terms.items():
+                for term, postings in terms.items():
+                    output_file.write(json.dumps({"kind": kind, "term": term, "hits": postings},
+                                                 ensure_ascii=False) + "\n")
+                    total += 1
+        return total
+
+    def stats(self) -> dict:
+        """Terms per kind, postings and lawsuits indexed."""
+        return {"terms": {kind: len(terms) for kind, terms in self.terms.items()},
+                "total_postings": self.total_postings,
+                "total_lawsuits": self.total_lawsuits}
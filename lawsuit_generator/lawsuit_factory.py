@@ -1,14 +1,254 @@
 from datetime import date, datetime
-import json
+import random
+import time
 
 from faker import Faker
+from faker.factory import Factory
+
+from lawsuit_generator.batch_random import MIN_YEAR, BatchRandom
+from lawsuit_generator.court_data import COURT_CODES, SEGMENT_REGIONS, STATES
+from lawsuit_generator.entity_pool import EntityPool
+from lawsuit_generator.fake_lawsuit import (CompactFolder, CompactLawsuit, FakeFolder,
+                                            FakeLawsuit, StreamingLawsuit)
+from lawsuit_generator import nup as nup_rules
+from lawsuit_generator.profiling import StageTimer
+from lawsuit_generator.size_profiles import DEFAULT_PROFILE, EVENT_NAMES, PROFILES, SizeProfile
+from lawsuit_generator.text_pool import TextPool
+from lawsuit_generator.uniqueness import UniqueRegistry
+
+SEED_MASK = 0xFFFFFFFFFFFFFFFF
+
+#NOTE Every Faker provider the factory calls, boolean comes from misc
+FAST_START_PROVIDERS = ("faker.providers.address", "faker.providers.company",
+                        "faker.providers.date_time", "faker.providers.internet",
+                        "faker.providers.lorem", "faker.providers.misc",
+                        "faker.providers.person", "faker.providers.ssn")
+
+CLASSIFICATION_NAMES = ["classificacao_um", "classificacao_dois",
+                        "classificacao_cinco", "classificacao_quatro"]
+
+
+def derive_seed(master_seed: int, index: int) -> int:
+    """Derive an independent 64 bits seed from a master seed and an index.
+
+    Uses the splitmix64 finalizer, so close indexes give unrelated seeds.
+
+    :param master_seed: Seed that identifies the whole generation
+    :type master_seed: int
+    :param index: Position of the unit (chunk, folder...) being seeded
+    :type index: int
+    :return: Derived seed
+    :rtype: int
+    """
+    z = (master_seed + (index + 1) * 0x9E3779B97F4A7C15) & SEED_MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & SEED_MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & SEED_MASK
+    return z ^ (z >> 31)
+
+
+class LazyEvents():
+    def __init__(self, factory, seed: int, event_counts: dict, events_args: dict):
+        """Deferred LawsuitFactory.generate_events call of a lazy lawsuit.
+
+        :param factory: Factory that generates the events
+        :type factory: LawsuitFactory
+        :param seed: Seed of this lawsuit events
+        :type seed: int
+        :param event_counts: Total of events per list, see draw_event_counts
+        :type event_counts: dict
+        :param events_args: Other generate_events arguments
+        :type events_args: dict
+        """
+        self.factory = factory
+        self.seed = seed
+        self.event_counts = event_counts
+        self.events_args = events_args
 
-from lawsuit_generator.fake_lawsuit import FakeFolder, FakeLawsuit
+    def __call__(self) -> dict:
+        """Generate the events with their own random stream, leaving the
+        factory stream where it was.
+
+        :return: Events lists, see generate_events
+        :rtype: dict
+        """
+        fake = self.factory.fake
+        previous_random = fake.random
+        fake.random = random.Random(self.seed)
+        try:
+            return self.factory.generate_events(event_counts=self.event_counts, **self.events_args)
+        finally:
+            fake.random = previous_random
 
 
 class LawsuitFactory():
-    def __init__(self):
-        self.fake = Faker(["pt_BR", "pt-BR"])
+    def __init__(self, seed: int=None, end_date: date=None,
+                 text_pool_size: int=None, text_pool_bytes: int=64 << 20,
+                 unique_registry: UniqueRegistry=None, instrument: bool=False,
+                 compact: bool=False, lazy_events: bool=False,
+                 size_profile: SizeProfile=None, batch_classifications: bool=False,
+                 batch_random: bool=False, ordered_timeline: bool=False,
+                 entity_pool_size: int=None, entity_pool_skew: float=1.1,
+                 fast_start: bool=False):
+        """Lawsuit fake data factory.
+
+        The time spent building the factory, pools included, is kept on
+        startup_seconds.
+
+        :param seed: Master seed, every folder generated by generate_folder_at
+            is seeded from (seed, index), defaults to None (not reproducible)
+        :type seed: int, optional
+        :param end_date: Latest date for any generated date, fix it to
+            reproduce data on other days, defaults to None (today)
+        :type end_date: date, optional
+        :param text_pool_size: Build a TextPool with this many items per pool
+            and sample event texts, urls and names from it instead of calling
+            Faker, defaults to None (no pool)
+        :type text_pool_size: int, optional
+        :param text_pool_bytes: Text memory limit of the pool, defaults to 64MiB
+        :type text_pool_bytes: int, optional
+        :param unique_registry: Regenerate lawsuit numbers, CPFs and CNPJs
+            already seen by this registry, defaults to None (no check). The
+            output then depends on generation order, not only on the seed
+        :type unique_registry: UniqueRegistry, optional
+        :param instrument: Record cumulative time per stage on stage_timer,
+            defaults to False
+        :type instrument: bool, optional
+        :param compact: Return CompactLawsuit/CompactFolder objects, defaults to False
+        :type compact: bool, optional
+        :param lazy_events: Only draw event counts and a seed per lawsuit, the
+            events are generated on the first access to an event list from
+            that seed. The events, and everything drawn after them, differ
+            from an eager factory with the same seed: a lazy seed is a
+            different (still seeded) dataset, defaults to False
+        :type lazy_events: bool, optional
+        :param size_profile: Event count distributions, a SizeProfile or a
+            PROFILES name, defaults to DEFAULT_PROFILE
+        :type size_profile: SizeProfile | str, optional
+        :param batch_classifications: Draw all classifications of a lawsuit at
+            once with generate_classification_batch, defaults to False
+        :type batch_classifications: bool, optional
+        :param batch_random: Draw counts, categorical fields and dates with
+            BatchRandom instead of Faker, a different (still seeded) stream,
+            defaults to False
+        :type batch_random: bool, optional
+        :param ordered_timeline: Generate every event list already in
+            chronological order, see FakeLawsuit.iter_timeline for the merged
+            view, defaults to False
+        :type ordered_timeline: bool, optional
+        :param entity_pool_size: Build an EntityPool with this many persons
+            (a quarter as many companies and a tenth as many lawyers) and
+            sample parts from it, so entities repeat across lawsuits. Part
+            documents then skip the unique_registry check, defaults to None
+            (fresh entities)
+        :type entity_pool_size: int, optional
+        :param entity_pool_skew: Zipf exponent of the entity sampling,
+            defaults to 1.1
+        :type entity_pool_skew: float, optional
+        :param fast_start: Use a pt_BR Faker generator with only
+            FAST_START_PROVIDERS loaded, without the multi-locale proxy. The
+            data is the same, but fake lacks the other providers,
+            defaults to False
+        :type fast_start: bool, optional
+        """
+        started_at = time.perf_counter()
+        if fast_start:
+            self.fake = Factory.create("pt_BR", providers=list(FAST_START_PROVIDERS))
+        else:
+            self.fake = Faker(["pt_BR", "pt-BR"])
+        self.seed = seed
+        self.unique_registry = unique_registry
+        self.compact = compact
+        self.lazy_events = lazy_events
+        self.batch_classifications = batch_classifications
+        if isinstance(size_profile, str):
+            size_profile = PROFILES[size_profile]
+        self.size_profile = size_profile or DEFAULT_PROFILE
+        self.end_date = end_date or "now"
+        if seed is not None:
+            self.fake.seed_instance(seed)
+        self.batch_random = None
+        if batch_random:
+            self.batch_random = BatchRandom(self.fake, end_date)
+        self.timeline_random = None
+        if ordered_timeline:
+            self.timeline_random = self.batch_random or BatchRandom(self.fake, end_date)
+        self.text_pool = None
+        if text_pool_size:
+            self.text_pool = TextPool(self.fake, size=text_pool_size, max_bytes=text_pool_bytes)
+            if seed is not None:
+                self.fake.seed_instance(seed)
+        self.entity_pool = None
+        if entity_pool_size:
+            self.entity_pool = EntityPool(self.fake, persons=entity_pool_size,
+                                          companies=max(1, entity_pool_size // 4),
+                                          lawyers=max(1, entity_pool_size // 10),
+                                          skew=entity_pool_skew)
+            if seed is not None:
+                self.fake.seed_instance(seed)
+        self.stage_timer = None
+        if instrument:
+            self.stage_timer = StageTimer()
+            self.stage_timer.instrument(self)
+        self.startup_seconds = time.perf_counter() - started_at
+
+    def _paragraph(self, nb_sentences: int) -> str:
+        if self.text_pool is None:
+            return self.fake.paragraph(nb_sentences=nb_sentences)
+        return self.text_pool.paragraph(nb_sentences)
+
+    def _url(self, document: bool=False) -> str:
+        if self.text_pool is not None:
+            return self.text_pool.url(document=document)
+        if document:
+            return self.fake.uri() + self.fake.uri_path() + self.fake.uri_page() + "/" + self.fake.uri_extension()
+        return self.fake.uri() + self.fake.uri_path() + self.fake.uri_page() + self.fake.uri_extension()
+
+    def _name(self) -> str:
+        if self.text_pool is None:
+            return self.fake.name()
+        return self.text_pool.name()
+
+    def _random_int(self, min_value: int, max_value: int) -> int:
+        if self.batch_random is None:
+            return self.fake.random_int(min=min_value, max=max_value)
+        return self.batch_random.integer(min_value, max_value)
+
+    def _choice(self, elements):
+        if self.batch_random is None:
+            return self.fake.random_choices(elements=elements, length=1)[0]
+        return self.batch_random.choice(elements)
+
+    def _boolean(self, chance_of_getting_true: int=50) -> bool:
+        if self.batch_random is None:
+            return self.fake.boolean(chance_of_getting_true=chance_of_getting_true)
+        return self.batch_random.boolean(chance_of_getting_true)
+
+    def _event_dates(self, min_year: str, total: int):
+        """Formatted dates of an event list, drawn one by one with Faker, all
+        at once with batch_random or in chronological order with
+        timeline_random."""
+        if self.timeline_random is not None:
+            return self.timeline_random.sorted_dates(min_year, total)
+        if self.batch_random is not None:
+            return self.batch_random.dates(min_year, total)
+        start_date = datetime.strptime(f"{min_year}-01-01", "%Y-%m-%d")
+        return (self.fake.date_between(start_date=start_date, end_date=self.end_date).strftime("%Y-%m-%d")
+                for _ in range(0, total))
+
+    def _nup_year(self) -> str:
+        if self.batch_random is None:
+            return self.fake.date_time(end_datetime=self.end_date).strftime("%Y")
+        return str(self.batch_random.integer(MIN_YEAR, self.batch_random.end_date.year))
+
+    def _distribution_date(self) -> str:
+        if self.batch_random is None:
+            return self.fake.date("%d/%m/%Y", end_datetime=self.end_date)
+        return self.batch_random.dates(MIN_YEAR, 1, "%d/%m/%Y")[0]
+
+    def _unique_document(self, kind: str, doc: str, generator) -> str:
+        while not self.unique_registry.add(kind, doc):
+            doc = generator()
+        return doc
 
     def generate_fake_dv(self, nup_id: str, nup_year: str, nup_seg: str,
                         nup_region: str, nup_orig: str) -> str:
@@ -39,13 +279,22 @@ class LawsuitFactory():
         mask = xxxxxxx-xx.xxxx.x.xx.xxxx
         rule = got from method generate_fake_dv
 
+        With a unique_registry, numbers already generated are drawn again.
+
         :return: Dict containing lawsuit number and infos gathered from it
         :rtype: dict
         """
+        number_info_dict = self._draw_nup()
+        if self.unique_registry is not None:
+            while not self.unique_registry.add("lawsuit_number", number_info_dict["complete"]):
+                number_info_dict = self._draw_nup()
+        return number_info_dict
+
+    def _draw_nup(self) -> dict:
         nup_id = str(self.fake.random_number(digits=7, fix_len=True))
-        nup_year = str(self.fake.year())
-        nup_seg = str(self.fake.random_choices(elements=("4", "5", "8"), length=1)[0])
-        nup_region = str(self.fake.random_int(min=1, max=28, step=1)).zfill(2)
+        nup_year = self._nup_year()
+        nup_seg = str(self._choice(nup_rules.SEGMENTS))
+        nup_region = self._choice(SEGMENT_REGIONS[nup_seg])
         nup_orig = str(self.fake.random_number(digits=4, fix_len=True))
         nup_dv = self.generate_fake_dv(nup_id, nup_year, nup_seg, nup_region, nup_orig)
         full_nup = f"{nup_id}-{nup_dv}.{nup_year}.{nup_seg}.{nup_region}.{nup_orig}"
@@ -57,6 +306,26 @@ class LawsuitFactory():
                 "origin": nup_orig,
                 "court_house": court_house}
 
+    def generate_nups(self, total: int) -> list:
+        """Generates many fake lawsuit numbers at once, see nup.generate_nups.
+
+        :param total: Total of lawsuit numbers to generate
+        :type total: int
+        :return: Complete lawsuit numbers generated
+        :rtype: list
+        """
+        max_year = date.today().year if self.end_date == "now" else self.end_date.year
+        nups = nup_rules.generate_nups(self.fake.random, total, min_year=1970, max_year=max_year)
+        if self.unique_registry is None:
+            return nups
+        unique_nups = list()
+        while nups:
+            unique_nups += [number for number in nups
+                            if self.unique_registry.add("lawsuit_number", number)]
+            nups = nup_rules.generate_nups(self.fake.random, total - len(unique_nups),
+                                           min_year=1970, max_year=max_year)
+        return unique_nups
+
     def generate_part(self, lawyer: bool=False) -> dict:
         """Generate fake lawsuit part with random information
 
@@ -68,17 +337,20 @@ class LawsuitFactory():
         if lawyer:
             part_type = "person"
         else:
-            part_type = self.fake.random_choices(elements=("person", "company", None),
-                                            length=1)[0]
+            part_type = self._choice(("person", "company", None))
         if not part_type:
             return None
+        if self.entity_pool is not None:
+            return self._pool_part(part_type, lawyer)
         if part_type == "person":
-            name = self.fake.name()
+            name = self._name()
             if not lawyer:
-                doc = self.fake.random_choices(elements=(self.fake.cpf(),
-                                                    "%s%s.%s%s%s.%s%s%s-%s" % tuple(self.fake.rg()),
-                                                    None),
-                                        length=1)[0]
+                cpf = self.fake.cpf()
+                doc = self._choice((cpf,
+                                    "%s%s.%s%s%s.%s%s%s-%s" % tuple(self.fake.rg()),
+                                    None))
+                if self.unique_registry is not None and doc == cpf:
+                    doc = self._unique_document("cpf", doc, self.fake.cpf)
             else:
                 lawyer_state = self.fake.state_abbr()
                 lawyer_id = str(self.fake.random_number(digits=6, fix_len=True))
@@ -89,7 +361,9 @@ class LawsuitFactory():
                 return {"nome": name}
         elif part_type == "company":
             name = self.fake.company()
-            doc = self.fake.random_choices(elements=(self.fake.cnpj(), None), length=1)[0]
+            doc = self._choice((self.fake.cnpj(), None))
+            if self.unique_registry is not None and doc:
+                doc = self._unique_document("cnpj", doc, self.fake.cnpj)
             if doc:
                 return {"nome": name, "documento": doc}
             else:
@@ -97,6 +371,19 @@ class LawsuitFactory():
         else:
             return None
 
+    def _pool_part(self, part_type: str, lawyer: bool) -> dict:
+        if lawyer:
+            name, doc = self.entity_pool.lawyer()
+        elif part_type == "person":
+            name, cpf, rg = self.entity_pool.person()
+            doc = self._choice((cpf, rg, None))
+        else:
+            name, cnpj = self.entity_pool.company()
+            doc = self._choice((cnpj, None))
+        if doc:
+            return {"nome": name, "documento": doc}
+        return {"nome": name}
+
     def generate_header(self, nup: str, instancia: int, court_house: str) -> dict:
         """Generate fake randomic lawsuit header datas.
 
@@ -109,67 +396,58 @@ class LawsuitFactory():
         :return: randomic header dictionary
         :rtype: dict
         """
-        with open("./lawsuit_generator/court_state_relation.json", "r") as json_states:
-                states_dict = json.load(json_states)
         if "TRT" in court_house:
             state_name = "Trabalhista"
         elif "TRF" in court_house:
             state_name = "Federal"
         else:
             state_abbr = court_house[2:]
-            state_name = states_dict["STATES"][state_abbr.upper()]
+            state_name = STATES[state_abbr.upper()]
 
         headers_dict = dict()
         headers_dict["numero_processo"] = nup
         headers_dict["instancia"] = instancia
-        law_class = self.fake.random_choices(elements=("Procedimento Comum",
-                                                "Execução Extrajudicial",
-                                                "Cumprimento de Senteça"),
-                                        length=1)[0]
+        law_class = self._choice(("Procedimento Comum",
+                                  "Execução Extrajudicial",
+                                  "Cumprimento de Senteça"))
         headers_dict["classe"] = law_class
         
-        subject = self.fake.random_choices(elements=(self.fake.paragraph(nb_sentences=1),
-                                                None),
-                                    length=1)[0]
+        subject = self._choice((self._paragraph(1), None))
         if subject:
             headers_dict["assunto"] = subject
         
-        forum = self.fake.random_choices(elements=(f"Foro {state_name}", None),
-                                    length=1)[0]
+        forum = self._choice((f"Foro {state_name}", None))
         if forum:
             headers_dict["foro"] = forum
         
-        area = self.fake.random_choices(elements=("Cível", None), length=1)[0]
+        area = self._choice(("Cível", None))
         if area:
             headers_dict["area"] = area
         
-        branch = f"{str(self.fake.random_int(min=1, max=9, step=1))}a Vara {state_name}"
+        branch = f"{str(self._random_int(1, 9))}a Vara {state_name}"
         district = f"Comarca {state_name}"
-        district_or_branch = self.fake.random_choices(elements=("vara", "comarca", None),
-                                        length=1)[0]
+        district_or_branch = self._choice(("vara", "comarca", None))
         if district_or_branch:
             if district_or_branch == "vara":
                 headers_dict["vara"] = branch
             else:
                 headers_dict["comarca"] = district
         
-        gen_url = self.fake.boolean()
+        gen_url = self._boolean()
         if gen_url:
-            url = self.fake.uri() + self.fake.uri_path() + self.fake.uri_page() + self.fake.uri_extension()
+            url = self._url()
             headers_dict["url_processo"] = url
         
-        judge = self.fake.random_choices(elements=(self.fake.name(), None), length=1)[0]
+        judge = self._choice((self._name(), None))
         if judge:
             headers_dict["juiz"] = judge
         
-        distribution = self.fake.random_choices(elements=(self.fake.date("%d/%m/%Y"), None),
-                                        length=1)[0]
+        distribution = self._choice((self._distribution_date(), None))
         if distribution:
             headers_dict["distribuicao"] = distribution
         
-        value_cause = self.fake.random_choices(elements=("{:.2f}".format(self.fake.random_int(min=1000, max=1000000, step=1)),
-                                                    None),
-                                        length=1)[0]
+        value_cause = self._choice(("{:.2f}".format(self._random_int(1000, 1000000)),
+                                    None))
         if value_cause:
             headers_dict["valor_causa"] = f"R$ {value_cause.replace('.', ',')}"
         return headers_dict
@@ -184,19 +462,19 @@ class LawsuitFactory():
         :return: List of fake progress generated
         :rtype: list
         """
-        progress_list = list()
-        start_date = datetime.strptime(f"{min_year}-01-01", "%Y-%m-%d")
-        for _ in range(0, total_progress):
+        return list(self.iter_progress(min_year, total_progress))
+
+    def iter_progress(self, min_year: str, total_progress: int=1):
+        """Iterator version of generate_progress, one progress at a time."""
+        for event_date in self._event_dates(min_year, total_progress):
             progress_dict = dict()
-            date = self.fake.date_between(start_date=start_date, end_date="now")
-            progress_dict["data_movimentacao"] = date.strftime("%Y-%m-%d")
-            progress = self.fake.paragraph(nb_sentences=self.fake.random_int(min=1, max=50))
+            progress_dict["data_movimentacao"] = event_date
+            progress = self._paragraph(self._random_int(1, 50))
             progress_dict["movimentacao"] = progress
-            if self.fake.boolean():
-                url = self.fake.uri() + self.fake.uri_path() + self.fake.uri_page() + "/" + self.fake.uri_extension()
+            if self._boolean():
+                url = self._url(document=True)
                 progress_dict["url_documento"] = url
-            progress_list.append(progress_dict)
-        return progress_list
+            yield progress_dict
 
     def generate_publication(self, min_year: str, lawsuit_number: str,
                              law_class: str, parts_name: str, lawyers_name: str,
@@ -218,21 +496,24 @@ class LawsuitFactory():
         :return: List of fake progress generated
         :rtype: list
         """
-        publications_list = list()
-        start_date = datetime.strptime(f"{min_year}-01-01", "%Y-%m-%d")
-        for _ in range(0, total_publications):
+        return list(self.iter_publication(min_year, lawsuit_number, law_class, parts_name,
+                                          lawyers_name, total_publications))
+
+    def iter_publication(self, min_year: str, lawsuit_number: str,
+                         law_class: str, parts_name: str, lawyers_name: str,
+                         total_publications: int=1):
+        """Iterator version of generate_publication, one publication at a time."""
+        for event_date in self._event_dates(min_year, total_publications):
             publication_dict = dict()
-            date = self.fake.date_between(start_date=start_date, end_date="now")
-            publication_dict["data_publicacao"] = date.strftime("%Y-%m-%d")
+            publication_dict["data_publicacao"] = event_date
             
-            publication = self.fake.paragraph(nb_sentences=self.fake.random_int(min=1, max=50))
+            publication = self._paragraph(self._random_int(1, 50))
             full_publication_text = f"{law_class.upper()} - PROCESSO {lawsuit_number} - {parts_name} - {publication} - adv: {lawyers_name}"
             publication_dict["publicacao"] = full_publication_text
-            if self.fake.boolean():
-                url = self.fake.uri() + self.fake.uri_path() + self.fake.uri_page() + "/" + self.fake.uri_extension()
+            if self._boolean():
+                url = self._url(document=True)
                 publication_dict["url_documento"] = url
-            publications_list.append(publication_dict)
-        return publications_list
+            yield publication_dict
 
     def generate_appendix(self, min_year: str, total_appendix: int=1) -> list:
         """Generates a fake quantity of appendix data.
@@ -244,18 +525,18 @@ class LawsuitFactory():
         :return: List of fake appendix generated
         :rtype: list
         """
-        appendix_list = list()
-        start_date = datetime.strptime(f"{min_year}-01-01", "%Y-%m-%d")
-        for _ in range(0, total_appendix):
+        return list(self.iter_appendix(min_year, total_appendix))
+
+    def iter_appendix(self, min_year: str, total_appendix: int=1):
+        """Iterator version of generate_appendix, one appendix at a time."""
+        for event_date in self._event_dates(min_year, total_appendix):
             appendix_dict = dict()
-            date = self.fake.date_between(start_date=start_date, end_date="now")
-            appendix_dict["data_documento"] = date.strftime("%Y-%m-%d")
-            description = self.fake.paragraph(nb_sentences=self.fake.random_int(min=1, max=5))
+            appendix_dict["data_documento"] = event_date
+            description = self._paragraph(self._random_int(1, 5))
             appendix_dict["descricao"] = description
-            url = self.fake.uri() + self.fake.uri_path() + self.fake.uri_page() + "/" + self.fake.uri_extension()
+            url = self._url(document=True)
             appendix_dict["url_documento"] = url
-            appendix_list.append(appendix_dict)
-        return appendix_list
+            yield appendix_dict
 
     def generate_petition(self, min_year: str, total_petition: int=1):
         """Generates a fake quantity of petition data.
@@ -267,16 +548,16 @@ class LawsuitFactory():
         :return: List of fake petitions generated
         :rtype: list
         """
-        petition_list = list()
-        start_date = datetime.strptime(f"{min_year}-01-01", "%Y-%m-%d")
-        for _ in range(0, total_petition):
+        return list(self.iter_petition(min_year, total_petition))
+
+    def iter_petition(self, min_year: str, total_petition: int=1):
+        """Iterator version of generate_petition, one petition at a time."""
+        for event_date in self._event_dates(min_year, total_petition):
             petition_dict = dict()
-            date = self.fake.date_between(start_date=start_date, end_date="now")
-            petition_dict["data_peticao"] = date.strftime("%Y-%m-%d")
-            petitio_type = self.fake.paragraph(nb_sentences=self.fake.random_int(min=1, max=1))
+            petition_dict["data_peticao"] = event_date
+            petitio_type = self._paragraph(self._random_int(1, 1))
             petition_dict["tipo"] = petitio_type
-            petition_list.append(petition_dict)
-        return petition_list
+            yield petition_dict
 
     def generate_auditions(self, min_year: str, total_auditions: int=1):
         """Generates a fake quantity of audition data.
@@ -288,49 +569,188 @@ class LawsuitFactory():
         :return: List of fake auditions generated
         :rtype: list
         """
-        audition_list = list()
-        start_date = datetime.strptime(f"{min_year}-01-01", "%Y-%m-%d")
-        for _ in range(0, total_auditions):
+        return list(self.iter_auditions(min_year, total_auditions))
+
+    def iter_auditions(self, min_year: str, total_auditions: int=1):
+        """Iterator version of generate_auditions, one audition at a time."""
+        for event_date in self._event_dates(min_year, total_auditions):
             audition_dict = dict()
-            date = self.fake.date_between(start_date=start_date, end_date="now")
-            audition_dict["data_audiencia"] = date.strftime("%Y-%m-%d")
-            audition_text = self.fake.paragraph(nb_sentences=self.fake.random_int(min=1, max=1))
+            audition_dict["data_audiencia"] = event_date
+            audition_text = self._paragraph(self._random_int(1, 1))
             audition_dict["audiencia"] = audition_text
-            audition_situation = self.fake.paragraph(nb_sentences=self.fake.random_int(min=1, max=1))
+            audition_situation = self._paragraph(self._random_int(1, 1))
             audition_dict["situacao"] = audition_situation[:20]
-            audition_dict["qtd_pessoas"] = self.fake.random_int(min=1, max=10)
-            audition_list.append(audition_dict)
-        return audition_list
+            audition_dict["qtd_pessoas"] = self._random_int(1, 10)
+            yield audition_dict
 
     def generate_classification(self, source: list, event_type):
         classifications_list = list()
-        classification_names_list = ["classificacao_um", "classificacao_dois",
-                                     "classificacao_cinco", "classificacao_quatro"]
         total_itens = len(source)
         percentage = 20
         max_classifications = round((total_itens*percentage)/100)
-        total_classifications = self.fake.random_int(min=0, max=max_classifications)
+        total_classifications = self._random_int(0, max_classifications)
         for _ in range(0, total_classifications):
-            source_obj = self.fake.random_choices(elements=source, length=1)[0]
-            classification_name = self.fake.random_choices(elements=classification_names_list,
-                                                           length=1)[0]
+            source_obj = self._choice(source)
+            classifications_list.append(self.classify_event(source_obj, event_type))
+        return classifications_list
+
+    def generate_classification_batch(self, source: list, event_type: str) -> list:
+        """Same as generate_classification, drawing the source events, names
+        and match spans of all classifications in a few bulk calls instead of
+        four Faker calls per classification.
+
+        :param source: Publications classified
+        :type source: list
+        :param event_type: Type of the event, like "publicacao"
+        :type event_type: str
+        :return: Classifications generated
+        :rtype: list
+        """
+        total_classifications = self._random_int(0, round((len(source)*20)/100))
+        if not total_classifications:
+            return list()
+        rnd = self.fake.random
+        source_objs = rnd.choices(source, k=total_classifications)
+        names = rnd.choices(CLASSIFICATION_NAMES, k=total_classifications)
+        spans = [rnd.random() for _ in range(2*total_classifications)]
+        classifications_list = list()
+        for position, source_obj in enumerate(source_objs):
+            text = source_obj["publicacao"]
             #NOTE Subtracted by 10 to have something left as an end
-            start_position = total_classifications = self.fake.random_int(min=0, max=len(source_obj["publicacao"])-10)
-            end_position = total_classifications = self.fake.random_int(min=start_position, max=len(source_obj["publicacao"]))
-            term = source_obj["publicacao"][start_position:end_position]
-            classification_obj = {
+            start_position = int(spans[2*position] * (max(len(text)-10, 0) + 1))
+            end_position = start_position + int(spans[2*position+1] * (len(text) - start_position + 1))
+            classifications_list.append({
                 "evento_obj": source_obj,
                 "tipo_evento": event_type,
-                "classificacao": classification_name,
+                "classificacao": names[position],
                 "ativo": True,
                 "match": {
                     "inicio": start_position,
                     "fim": end_position,
-                    "termo": term
+                    "termo": text[start_position:end_position]
                 }
+            })
+        return classifications_list
+
+    def classify_event(self, source_obj: dict, event_type: str) -> dict:
+        """Generate one classification matching a span of a publication.
+
+        :param source_obj: Publication classified
+        :type source_obj: dict
+        :param event_type: Type of the event, like "publicacao"
+        :type event_type: str
+        :return: Classification generated
+        :rtype: dict
+        """
+        classification_name = self._choice(CLASSIFICATION_NAMES)
+        #NOTE Subtracted by 10 to have something left as an end
+        start_position = self._random_int(0, len(source_obj["publicacao"])-10)
+        end_position = self._random_int(start_position, len(source_obj["publicacao"]))
+        term = source_obj["publicacao"][start_position:end_position]
+        return {
+            "evento_obj": source_obj,
+            "tipo_evento": event_type,
+            "classificacao": classification_name,
+            "ativo": True,
+            "match": {
+                "inicio": start_position,
+                "fim": end_position,
+                "termo": term
             }
-            classifications_list.append(classification_obj)
-        return classifications_list        
+        }
+
+    def generate_parts(self) -> dict:
+        """Generate every part and lawyer list of a lawsuit.
+
+        :return: part_active, part_active_lawyer, part_passive,
+            part_passive_lawyer and part_others lists
+        :rtype: dict
+        """
+        parts = dict()
+        parts["part_active"] = [self.generate_part() for x in range(0, self._random_int(0, 5))]
+        parts["part_active_lawyer"] = [self.generate_part(lawyer=True) for x in range(0, self._random_int(0, 5))]
+        parts["part_passive"] = [self.generate_part() for x in range(0, self._random_int(0, 5))]
+        parts["part_passive_lawyer"] = [self.generate_part(lawyer=True) for x in range(0, self._random_int(0, 5))]
+        parts["part_others"] = [self.generate_part() for x in range(0, self._random_int(0, 5))]
+        return parts
+
+    def events_args(self, number_info_dict: dict, header: dict, parts: dict) -> dict:
+        """Arguments of generate_events and iter_publication shared by all the
+        events of a lawsuit.
+
+        :param number_info_dict: Lawsuit number info, "year" and "complete"
+            are used, see generate_nup
+        :type number_info_dict: dict
+        :param header: Lawsuit header, "classe" is used
+        :type header: dict
+        :param parts: Part lists, see generate_parts
+        :type parts: dict
+        :return: min_year, lawsuit_number, law_class, parts_name and lawyers_name
+        :rtype: dict
+        """
+        parts_name = [x["nome"] for x in parts["part_active"] + parts["part_passive"] if x]
+        lawyers_name = [x["nome"] for x in parts["part_active_lawyer"] + parts["part_passive_lawyer"] if x]
+        return {"min_year": number_info_dict["year"],
+                "lawsuit_number": number_info_dict["complete"],
+                "law_class": header.get("classe", ""),
+                "parts_name": " - ".join(parts_name),
+                "lawyers_name": " - ".join(lawyers_name)}
+
+    def draw_event_counts(self) -> dict:
+        """Draw how many events of each list a lawsuit has.
+
+        :return: Event list name (publication, progress...) to total
+        :rtype: dict
+        """
+        return {event_name: self.size_profile.draw(self.fake, event_name, self._random_int)
+                for event_name in EVENT_NAMES}
+
+    def generate_events(self, min_year: str, lawsuit_number: str, law_class: str,
+                        parts_name: str, lawyers_name: str, event_counts: dict=None) -> dict:
+        """Generate every event list of a lawsuit.
+
+        :param min_year: Minimal year base to generate
+        :type min_year: str
+        :param lawsuit_number: Number of lawsuit
+        :type lawsuit_number: str
+        :param law_class: Class of the lawsuit, present in header
+        :type law_class: str
+        :param parts_name: Name of both active and passive parts
+        :type parts_name: str
+        :param lawyers_name: Name of active and passive lawyers
+        :type lawyers_name: str
+        :param event_counts: Total per event list, defaults to None (drawn
+            right before each list, as draw_event_counts would)
+        :type event_counts: dict, optional
+        :return: Event name (publication, progress, appendix, petition,
+            audition, classification) to its list
+        :rtype: dict
+        """
+        def total(event_name):
+            if event_counts is not None:
+                return event_counts[event_name]
+            return self.size_profile.draw(self.fake, event_name, self._random_int)
+
+        events = dict()
+        events["publication"] = self.generate_publication(min_year=min_year,
+                                                          lawsuit_number=lawsuit_number,
+                                                          law_class=law_class,
+                                                          parts_name=parts_name,
+                                                          lawyers_name=lawyers_name,
+                                                          total_publications=total("publication"))
+        events["progress"] = self.generate_progress(min_year=min_year,
+                                                    total_progress=total("progress"))
+        events["appendix"] = self.generate_appendix(min_year=min_year,
+                                                    total_appendix=total("appendix"))
+        events["petition"] = self.generate_petition(min_year=min_year,
+                                                    total_petition=total("petition"))
+        events["audition"] = self.generate_auditions(min_year=min_year,
+                                                     total_auditions=total("audition"))
+        if self.batch_classifications:
+            events["classification"] = self.generate_classification_batch(events["publication"], "publicacao")
+        else:
+            events["classification"] = self.generate_classification(events["publication"], "publicacao")
+        return events
 
     def generate_status(self) -> str:
         """Generate a fake status classification for lawsuit.
@@ -338,8 +758,7 @@ class LawsuitFactory():
         :return: Random classification option
         :rtype: str
         """
-        return self.fake.random_choices(elements=("ativo", "arquivado", "suspenso", None),
-                                length=1)[0]
+        return self._choice(("ativo", "arquivado", "suspenso", None))
 
     def generate_full_lawsuit(self, lw_instance: int=1, is_main: bool=True,
                               is_appeal: bool=False, is_recourse: bool=False,
@@ -368,12 +787,8 @@ class LawsuitFactory():
         status = self.generate_status()
         if is_secret:
             header = {"secret": "Dados apenas no tribunal"}
-            progress_list = list()
-            appendix_list = list()
-            publication_list = list()
-            petition_list = list()
-            audition_list = list()
-            classification_list = list()
+            events = {"publication": list(), "progress": list(), "appendix": list(),
+                      "petition": list(), "audition": list(), "classification": list()}
             part_active_list = list()
             part_active_lawyer_list = list()
             part_passive_list = list()
@@ -384,37 +799,20 @@ class LawsuitFactory():
                                           instancia=lw_instance,
                                           court_house=number_info_dict["court_house"])
             
-            part_active_list = [self.generate_part() for x in range(0, self.fake.random_int(min=0, max=5))]
-            part_active_lawyer_list = [self.generate_part(lawyer=True) for x in range(0, self.fake.random_int(min=0, max=5))]
-            part_passive_list = [self.generate_part() for x in range(0, self.fake.random_int(min=0, max=5))]
-            part_passive_lawyer_list = [self.generate_part(lawyer=True) for x in range(0, self.fake.random_int(min=0, max=5))]
-            part_others_list = [self.generate_part() for x in range(0, self.fake.random_int(min=0, max=5))]
-            
-            parts_name = list()
-            if part_active_list:
-                parts_name += [x["nome"] for x in part_active_list if x]
-            if part_passive_list:
-                parts_name += [x["nome"] for x in part_passive_list if x]
-            lawyers_name = list()
-            if part_active_lawyer_list:
-                lawyers_name += [x["nome"] for x in part_active_lawyer_list if x]
-            if part_passive_lawyer_list:
-                lawyers_name += [x["nome"] for x in part_passive_lawyer_list if x]
-            publication_list = self.generate_publication(min_year=number_info_dict["year"],
-                                                         lawsuit_number=number_info_dict["complete"],
-                                                         law_class=header.get("classe", ""),
-                                                         parts_name=" - ".join(parts_name),
-                                                         lawyers_name=" - ".join(lawyers_name),
-                                                         total_publications=self.fake.random_int(min=0, max=100))
-            progress_list = self.generate_progress(min_year=number_info_dict["year"],
-                                                   total_progress=self.fake.random_int(min=0, max=100))
-            appendix_list = self.generate_appendix(min_year=number_info_dict["year"],
-                                                   total_appendix=self.fake.random_int(min=0, max=50))
-            petition_list = self.generate_petition(min_year=number_info_dict["year"],
-                                                   total_petition=self.fake.random_int(min=0, max=30))
-            audition_list = self.generate_auditions(min_year=number_info_dict["year"],
-                                                    total_auditions=self.fake.random_int(min=0, max=30))
-            classification_list = self.generate_classification(publication_list, "publicacao")
+            parts = self.generate_parts()
+            part_active_list = parts["part_active"]
+            part_active_lawyer_list = parts["part_active_lawyer"]
+            part_passive_list = parts["part_passive"]
+            part_passive_lawyer_list = parts["part_passive_lawyer"]
+            part_others_list = parts["part_others"]
+            events_args = self.events_args(number_info_dict, header, parts)
+            if self.lazy_events:
+                event_counts = self.draw_event_counts()
+                events_seed = self.fake.random.getrandbits(64)
+                events = {"events_loader": LazyEvents(self, events_seed, event_counts, events_args),
+                          "event_counts": event_counts}
+            else:
+                events = self.generate_events(**events_args)
         fake_obj = FakeLawsuit(lawsuit_number=number_info_dict["complete"],
                                year=number_info_dict["year"],
                                segment=number_info_dict["segment"],
@@ -430,26 +828,82 @@ class LawsuitFactory():
                                is_dependent=is_dependent,
                                is_secret=is_secret,
                                header=header,
-                               petition=petition_list,
-                               audition=audition_list,
-                               progress=progress_list,
-                               appendix=appendix_list,
-                               publication=publication_list,
-                               classification=classification_list,
+                               **events,
                                part_active=part_active_list,
                                part_active_lawyer=part_active_lawyer_list,
                                part_passive=part_passive_list,
                                part_passive_lawyer=part_passive_lawyer_list,
                                part_others=part_others_list,)
+        if self.compact:
+            return CompactLawsuit.from_lawsuit(fake_obj)
         return fake_obj
 
+    def generate_streaming_lawsuit(self, lw_instance: int=1,
+                                   classification_chance: float=0.1) -> StreamingLawsuit:
+        """Generate a lawsuit whose events are only created while it is written.
+
+        Number, header and parts are generated now, event counts come from
+        the size profile and the events are produced one by one by
+        StreamingLawsuit.write_json, so lawsuits with hundreds of thousands
+        of events are written with constant memory.
+
+        :param lw_instance: Instance reference, defaults to 1
+        :type lw_instance: int, optional
+        :param classification_chance: Chance of each publication to get a
+            classification, defaults to 0.1 (mean of generate_classification)
+        :type classification_chance: float, optional
+        :return: Lawsuit to be written
+        :rtype: StreamingLawsuit
+        """
+        number_info_dict = self.generate_nup()
+        status = self.generate_status()
+        header = self.generate_header(nup=number_info_dict["complete"],
+                                      instancia=lw_instance,
+                                      court_house=number_info_dict["court_house"])
+        parts = self.generate_parts()
+        events_args = self.events_args(number_info_dict, header, parts)
+        event_counts = self.draw_event_counts()
+        min_year = events_args["min_year"]
+        event_iterators = {
+            "petition_list": lambda: self.iter_petition(min_year, event_counts["petition"]),
+            "audition_list": lambda: self.iter_auditions(min_year, event_counts["audition"]),
+            "progress_list": lambda: self.iter_progress(min_year, event_counts["progress"]),
+            "appendix_list": lambda: self.iter_appendix(min_year, event_counts["appendix"]),
+            "publication_list": lambda: self.iter_publication(
+                total_publications=event_counts["publication"], **events_args),
+        }
+
+        def classify(publication):
+            if self.fake.random.random() < classification_chance:
+                return self.classify_event(publication, "publicacao")
+            return None
+
+        return StreamingLawsuit(lawsuit_number=number_info_dict["complete"],
+                                year=number_info_dict["year"],
+                                segment=number_info_dict["segment"],
+                                region=number_info_dict["region"],
+                                origin=number_info_dict["origin"],
+                                court_house=number_info_dict["court_house"],
+                                status=status,
+                                instance=lw_instance,
+                                is_secret=False,
+                                header=header,
+                                event_counts=event_counts,
+                                event_iterators=event_iterators,
+                                classify=classify,
+                                part_active=parts["part_active"],
+                                part_active_lawyer=parts["part_active_lawyer"],
+                                part_passive=parts["part_passive"],
+                                part_passive_lawyer=parts["part_passive_lawyer"],
+                                part_other=parts["part_others"])
+
     def generate_full_folder(self) -> FakeFolder:
         """Generate complete folder, with multiple lawsuits related.
 
         :return: Folder folder generated
         :rtype: FakeFolder
         """
-        is_secret = self.fake.boolean(chance_of_getting_true=20)
+        is_secret = self._boolean(chance_of_getting_true=20)
         main_lawsuit = self.generate_full_lawsuit(lw_instance=1, is_main=True, is_secret=is_secret)
         if is_secret:
             main_number = main_lawsuit.lawsuit_number
@@ -464,13 +918,13 @@ class LawsuitFactory():
             book_name = f"{main_number}: PROCESSO GERADO"
             court_house = main_lawsuit.court_house
             appeals = [self.generate_full_lawsuit(lw_instance=1, is_main=False,
-                                             is_appeal=True) for x in range(0, self.fake.random_int(min=0, max=3))]
+                                             is_appeal=True) for x in range(0, self._random_int(0, 3))]
             attached = [self.generate_full_lawsuit(lw_instance=1, is_main=False,
-                                             is_attached=True) for x in range(0, self.fake.random_int(min=0, max=3))]
+                                             is_attached=True) for x in range(0, self._random_int(0, 3))]
             dependents = [self.generate_full_lawsuit(lw_instance=1, is_main=False,
-                                             is_dependent=True) for x in range(0, self.fake.random_int(min=0, max=3))]
+                                             is_dependent=True) for x in range(0, self._random_int(0, 3))]
             recourses = [self.generate_full_lawsuit(lw_instance=2, is_main=False,
-                                             is_recourse=True) for x in range(0, self.fake.random_int(min=0, max=3))]
+                                             is_recourse=True) for x in range(0, self._random_int(0, 3))]
         fake_obj = FakeFolder(main_number=main_number,
                               book_name=book_name,
                               court_house=court_house,
@@ -479,18 +933,58 @@ class LawsuitFactory():
                               recourses=recourses,
                               attached=attached,
                               dependent=dependents)
+        if self.compact:
+            return CompactFolder.from_folder(fake_obj)
         return fake_obj
 
-    def generate_multiple_folders(self, total_folders: int=2) -> list:
+    def generate_folder_at(self, index: int) -> FakeFolder:
+        """Generate the folder at a given position of the seeded dataset.
+
+        The folder randomness comes only from (seed, index), so any folder
+        can be regenerated without generating the ones before it.
+
+        :param index: Position of the folder in the dataset
+        :type index: int
+        :raises ValueError: If the factory was built without a seed
+        :return: Folder generated
+        :rtype: FakeFolder
+        """
+        if self.seed is None:
+            raise ValueError("generate_folder_at needs a factory built with a seed")
+        self.fake.seed_instance(derive_seed(self.seed, index))
+        return self.generate_full_folder()
+
+    def generate_lawsuit_at(self, index: int) -> FakeLawsuit:
+        """Generate a standalone main lawsuit at a given position of the
+        seeded dataset, see generate_folder_at.
+
+        :param index: Position of the lawsuit in the dataset
+        :type index: int
+        :raises ValueError: If the factory was built without a seed
+        :return: Lawsuit generated
+        :rtype: FakeLawsuit
+        """
+        if self.seed is None:
+            raise ValueError("generate_lawsuit_at needs a factory built with a seed")
+        self.fake.seed_instance(derive_seed(self.seed, index))
+        return self.generate_full_lawsuit()
+
+    def generate_multiple_folders(self, total_folders: int=2, start_index: int=0) -> list:
         """Generate multiple lawsuit Folders.
 
         :param total_folders: Total of Lawsuit Folders to generate, defaults to 2
         :type total_folders: int, optional
+        :param start_index: Index of the first folder, only used by seeded
+            factories, defaults to 0
+        :type start_index: int, optional
         :return: All Folders generated
         :rtype: list
         """
-        for _ in range(0, total_folders):
-            folder_obj = self.generate_full_folder()
+        for index in range(start_index, start_index + total_folders):
+            if self.seed is None:
+                folder_obj = self.generate_full_folder()
+            else:
+                folder_obj = self.generate_folder_at(index)
             yield folder_obj
 
     def dispatch_court(self, segment: str, state: str) -> str:
@@ -504,66 +998,8 @@ class LawsuitFactory():
         :type segment: str
         :param state: Estado em que o processo esta rolando
         :type state: str
+        :raises KeyError: Se o segmento/estado nao existe
         :return: Sigla do tribunal
         :rtype: str
         """
-        if segment == "8" and state == "01":
-            return "TJAC"
-        elif segment == "8" and state == "02":
-            return "TJAL"
-        elif segment == "8" and state == "03":
-            return "TJAP"
-        elif segment == "8" and state == "04":
-            return "TJAM"
-        elif segment == "8" and state == "05":
-            return "TJBA"
-        elif segment == "8" and state == "06":
-            return "TJCE"
-        elif segment == "8" and state == "07":
-            return "TJDF"
-        elif segment == "8" and state == "08":
-            return "TJES"
-        elif segment == "8" and state == "09":
-            return "TJGO"
-        elif segment == "8" and state == "10":
-            return "TJMA"
-        elif segment == "8" and state == "11":
-            return "TJMT"
-        elif segment == "8" and state == "12":
-            return "TJMS"
-        elif segment == "8" and state == "13":
-            return "TJMG"
-        elif segment == "8" and state == "14":
-            return "TJPA"
-        elif segment == "8" and state == "15":
-            return "TJPB"
-        elif segment == "8" and state == "16":
-            return "TJPR"
-        elif segment == "8" and state == "17":
-            return "TJPE"
-        elif segment == "8" and state == "18":
-            return "TJPI"
-        elif segment == "8" and state == "19":
-            return "TJRJ"
-        elif segment == "8" and state == "20":
-            return "TJRN"
-        elif segment == "8" and state == "21":
-            return "TJRS"
-        elif segment == "8" and state == "22":
-            return "TJRO"
-        elif segment == "8" and state == "23":
-            return "TJRR"
-        elif segment == "8" and state == "24":
-            return "TJSC"
-        elif segment == "8" and state == "25":
-            return "TJSE"
-        elif segment == "8" and state == "26":
-            return "TJSP"
-        elif segment == "8" and state == "27":
-            return "TJTO"
-        elif segment == "4":
-            return f"TRF{state}"
-        elif segment == "5":
-            return f"TRT{state}"
-        else: # For a default result to test
-            return "TJSP"
\ No newline at end of file
+        return COURT_CODES[(segment, state)]
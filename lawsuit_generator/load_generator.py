@@ -0,0 +1,436 @@
+"""Rate-controlled load generator.
+
+Usage:
+    python -m lawsuit_generator.load_generator --rate 20 --duration 60 --output -
+    python -m lawsuit_generator.load_generator --unit lawsuits --rate 1 --rate-unit mb \\
+        --ramp-to 5 --ramp-seconds 300 --output http://localhost:8080/ingest
+"""
+import argparse
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import http.client
+import json
+import queue
+import socket
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from lawsuit_generator.lawsuit_factory import LawsuitFactory
+
+UNITS = ("folders", "lawsuits")
+RATE_UNITS = ("items", "mb")
+
+#NOTE Put on the queue by a producer that failed, lines are bytes
+_PRODUCER_FAILED = None
+
+
+class RateSchedule():
+    def __init__(self, rate: float, ramp_to: float=None, ramp_seconds: float=0.0):
+        """Target rate over time, fixed or ramping linearly.
+
+        :param rate: Rate at the start, in items or MB per second
+        :type rate: float
+        :param ramp_to: Rate reached after ramp_seconds, defaults to None (fixed)
+        :type ramp_to: float, optional
+        :param ramp_seconds: Duration of the ramp, defaults to 0.0
+        :type ramp_seconds: float, optional
+        :raises ValueError: If a rate is not greater than zero
+        """
+        if rate <= 0 or (ramp_to is not None and ramp_to <= 0):
+            raise ValueError("rates must be greater than zero")
+        self.rate = rate
+        self.ramp_to = rate if ramp_to is None else ramp_to
+        self.ramp_seconds = ramp_seconds
+
+    def rate_at(self, elapsed: float) -> float:
+        """Target rate after elapsed seconds."""
+        if not self.ramp_seconds or elapsed >= self.ramp_seconds:
+            return self.ramp_to
+        return self.rate + (self.ramp_to - self.rate) * max(elapsed, 0.0) / self.ramp_seconds
+
+
+class StreamSink():
+    def __init__(self, file_obj, close_file: bool=False):
+        """Write lines to a binary file object, like sys.stdout.buffer."""
+        self.file_obj = file_obj
+        self.close_file = close_file
+
+    def send(self, data: bytes):
+        self.file_obj.write(data)
+
+    def close(self):
+        self.file_obj.flush()
+        if self.close_file:
+            self.file_obj.close()
+
+
+class SocketSink():
+    def __init__(self, host: str, port: int):
+        """Write lines to a TCP connection."""
+        self.connection = socket.create_connection((host, port))
+
+    def send(self, data: bytes):
+        self.connection.sendall(data)
+
+    def close(self):
+        self.connection.close()
+
+
+class HttpSink():
+    def __init__(self, url: str):
+        """POST each line to an url, on a keep-alive connection.
+
+        :param url: http url receiving the lines
+        :type url: str
+        """
+        parts = urlsplit(url)
+        self.path = parts.path or "/"
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80)
+
+    def send(self, data: bytes):
+        """POST one line.
+
+        :raises ConnectionError: If the server answers an error status
+        """
+        self.connection.request("POST", self.path, body=data,
+                                headers={"Content-Type": "application/x-ndjson"})
+        response = self.connection.getresponse()
+        response.read()
+        if response.status >= 400:
+            raise ConnectionError(f"{self.path} answered {response.status}")
+
+    def close(self):
+        self.connection.close()
+
+
+class LocalHttpServer():
+    def __init__(self, host: str="127.0.0.1", port: int=0):
+        """Local HTTP stand-in of an ingestion service, counting what it gets.
+
+        :param host: Interface to listen on, defaults to "127.0.0.1"
+        :type host: str, optional
+        :param port: Port to listen on, defaults to 0 (any free port)
+        :type port: int, optional
+        """
+        self.total_requests = 0
+        self.total_bytes = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server.total_requests += 1
+                server.total_bytes += len(body)
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class LocalHttpSink(HttpSink):
+    def __init__(self):
+        """HttpSink posting to its own LocalHttpServer."""
+        self.server = LocalHttpServer()
+        super().__init__(self.server.url)
+
+    def close(self):
+        super().close()
+        self.server.close()
+
+
+def open_sink(target: str):
+    """Build the sink of a target.
+
+    :param target: "-" (stdout), "tcp://host:port", "http://host:port/path",
+        "http-local" (LocalHttpServer stand-in) or a file path
+    :type target: str
+    :return: Sink with send(data) and close()
+    :rtype: StreamSink | SocketSink | HttpSink | LocalHttpSink
+    """
+    if target == "-":
+        return StreamSink(sys.stdout.buffer)
+    if target == "http-local":
+        return LocalHttpSink()
+    if target.startswith("tcp://"):
+        parts = urlsplit(target)
+        return SocketSink(parts.hostname, parts.port)
+    if target.startswith("http://"):
+        return HttpSink(target)
+    return StreamSink(open(target, "wb"), close_file=True)
+
+
+class LoadGenerator():
+    def __init__(self, sink, rate: float, unit: str="folders", rate_unit: str="items",
+                 ramp_to: float=None, ramp_seconds: float=0.0, seed: int=0,
+                 start_index: int=0, prefetch: int=1000, max_lag: float=None,
+                 end_date: date=None, **factory_kwargs):
+        """Send generated folders or lawsuits to a sink at a target rate.
+
+        Items are generated ahead on a background thread into a queue of
+        prefetch encoded lines, seeded by (seed, index), so the same
+        arguments always send the same lines, in index order. The sender
+        sleeps until each item is due; when it falls more than max_lag
+        seconds behind, the missed send slots are counted as dropped and the
+        schedule restarts from now instead of bursting to catch up.
+
+        :param sink: Object with send(data: bytes) and close(), see open_sink
+        :type sink: StreamSink | SocketSink | HttpSink
+        :param rate: Target rate, see RateSchedule
+        :type rate: float
+        :param unit: "folders" or "lawsuits", defaults to "folders"
+        :type unit: str, optional
+        :param rate_unit: Rate counted in "items" or "mb" per second,
+            defaults to "items"
+        :type rate_unit: str, optional
+        :param ramp_to: Rate reached after ramp_seconds, defaults to None (fixed)
+        :type ramp_to: float, optional
+        :param ramp_seconds: Duration of the ramp, defaults to 0.0
+        :type ramp_seconds: float, optional
+        :param seed: Master seed, defaults to 0
+        :type seed: int, optional
+        :param start_index: Index of the first item, defaults to 0
+        :type start_index: int, optional
+        :param prefetch: Encoded items generated ahead, defaults to 1000
+        :type prefetch: int, optional
+        :param max_lag: Seconds behind schedule before dropping the missed
+            slots, defaults to None (never drop, catch up instead)
+        :type max_lag: float, optional
+        :param end_date: Latest date for generated dates, defaults to today
+        :type end_date: date, optional
+        :param factory_kwargs: Other LawsuitFactory arguments, like text_pool_size
+        :raises ValueError: If unit or rate_unit is not supported
+        """
+        if unit not in UNITS:
+            raise ValueError(f"unit must be one of {UNITS}")
+        if rate_unit not in RATE_UNITS:
+            raise ValueError(f"rate_unit must be one of {RATE_UNITS}")
+        self.sink = sink
+        self.unit = unit
+        self.rate_unit = rate_unit
+        self.schedule = RateSchedule(rate, ramp_to, ramp_seconds)
+        self.max_lag = max_lag
+        self.next_index = start_index
+        factory_kwargs.setdefault("compact", True)
+        self.factory = LawsuitFactory(seed=seed, end_date=end_date or date.today(),
+                                      **factory_kwargs)
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._producer = None
+        self._producer_error = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.items_sent = 0
+        self.bytes_sent = 0
+        self.items_dropped = 0
+        self.underruns = 0
+        self.total_lag = 0.0
+        self.max_lag_seen = 0.0
+        self.started_at = None
+        self.elapsed = 0.0
+
+    def _put(self, line: bytes):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(line, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _produce(self):
+        if self.unit == "folders":
+            generate = self.factory.generate_folder_at
+        else:
+            generate = self.factory.generate_lawsuit_at
+        try:
+            while not self._stop.is_set():
+                item = generate(self.next_index)
+                self.next_index += 1
+                if hasattr(item, "to_bytes"):
+                    line = item.to_bytes() + b"\n"
+                else:
+                    line = json.dumps(item.to_json(), ensure_ascii=False).encode("utf-8") + b"\n"
+                self._put(line)
+        #NOTE Any error is kept and raised again by run
+        except Exception as err: # pylint: disable=broad-except
+            self._producer_error = err
+            self._put(_PRODUCER_FAILED)
+
+    def start(self):
+        """Start generating ahead, before run, so the first items are ready."""
+        if self._producer is None:
+            self._producer = threading.Thread(target=self._produce, daemon=True)
+            self._producer.start()
+
+    def run(self, duration: float=None, total: int=None, report_every: float=None,
+            report=None) -> dict:
+        """Send items until duration seconds passed or total items were sent.
+
+        :param duration: Seconds to run, defaults to None
+        :type duration: float, optional
+        :param total: Items to send, defaults to None
+        :type total: int, optional
+        :param report_every: Seconds between calls to report, defaults to None
+        :type report_every: float, optional
+        :param report: Called with stats() every report_every seconds,
+            defaults to None
+        :type report: callable, optional
+        :raises ValueError: If neither duration nor total is given, or
+            report_every is given without report
+        :raises Exception: The error that stopped the generator thread
+        :return: Final stats, see stats
+        :rtype: dict
+        """
+        if duration is None and total is None:
+            raise ValueError("run needs a duration or a total")
+        if report_every and report is None:
+            raise ValueError("report_every needs a report callable")
+        self.start()
+        clock = time.perf_counter
+        self.started_at = clock()
+        due = self.started_at
+        deadline = self.started_at + duration if duration is not None else None
+        next_report = self.started_at + report_every if report_every else None
+        while (total is None or self.items_sent < total) and \
+                (deadline is None or clock() < deadline):
+            now = clock()
+            if due > now:
+                time.sleep((due if deadline is None else min(due, deadline)) - now)
+                if deadline is not None and clock() >= deadline:
+                    break
+            if self._queue.empty():
+                self.underruns += 1
+            try:
+                line = self._queue.get(timeout=None if deadline is None
+                                       else max(0.0, deadline - clock()))
+            except queue.Empty:
+                break
+            if line is _PRODUCER_FAILED:
+                #NOTE Left on the queue, so later runs fail too
+                self._queue.put(_PRODUCER_FAILED)
+                self.elapsed = clock() - self.started_at
+                raise self._producer_error
+            now = clock()
+            lag = max(0.0, now - due)
+            units = 1 if self.rate_unit == "items" else len(line) / 1e6
+            if self.max_lag is not None and lag > self.max_lag:
+                rate = self.schedule.rate_at(now - self.started_at)
+                self.items_dropped += int(lag * rate / units)
+                due = now
+            self.sink.send(line)
+            self.items_sent += 1
+            self.bytes_sent += len(line)
+            self.total_lag += lag
+            self.max_lag_seen = max(self.max_lag_seen, lag)
+            due += units / self.schedule.rate_at(due - self.started_at)
+            if next_report is not None and now >= next_report:
+                self.elapsed = now - self.started_at
+                report(self.stats())
+                next_report += report_every
+        self.elapsed = clock() - self.started_at
+        return self.stats()
+
+    def stats(self) -> dict:
+        """Achieved rates, lag and drops of the current run.
+
+        :return: items_sent, items_dropped (send slots missed), bytes_sent, seconds,
+            items_per_sec, mb_per_sec, target_rate, mean_lag, max_lag,
+            underruns (times the sender waited for the generator) and
+            factory_startup_seconds
+        :rtype: dict
+        """
+        seconds = self.elapsed
+        return {"items_sent": self.items_sent,
+                "items_dropped": self.items_dropped,
+                "bytes_sent": self.bytes_sent,
+                "seconds": seconds,
+                "items_per_sec": self.items_sent / seconds if seconds else 0.0,
+                "mb_per_sec": self.bytes_sent / 1e6 / seconds if seconds else 0.0,
+                "target_rate": self.schedule.rate_at(seconds),
+                "mean_lag": self.total_lag / self.items_sent if self.items_sent else 0.0,
+                "max_lag": self.max_lag_seen,
+                "underruns": self.underruns,
+                "factory_startup_seconds": self.factory.startup_seconds}
+
+    def close(self):
+        """Stop the generator thread and close the sink."""
+        self._stop.set()
+        if self._producer is not None:
+            self._producer.join()
+            self._producer = None
+        self.sink.close()
+
+
+def main(argv: list=None) -> int:
+    parser = argparse.ArgumentParser(description="Send generated lawsuits at a target rate.")
+    parser.add_argument("--rate", type=float, required=True, help="target rate at the start")
+    parser.add_argument("--rate-unit", choices=RATE_UNITS, default="items",
+                        help="rate in items or MB per second, defaults to items")
+    parser.add_argument("--ramp-to", type=float, default=None, help="rate at the end of the ramp")
+    parser.add_argument("--ramp-seconds", type=float, default=0.0)
+    parser.add_argument("--unit", choices=UNITS, default="folders")
+    parser.add_argument("--duration", type=float, default=None, help="seconds to run")
+    parser.add_argument("--total", type=int, default=None, help="items to send")
+    parser.add_argument("--output", default="-",
+                        help="'-', file path, tcp://host:port, http://host:port/path or http-local")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-index", type=int, default=0)
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None,
+                        help="latest generated date, YYYY-MM-DD, defaults to today")
+    parser.add_argument("--prefetch", type=int, default=1000, help="items generated ahead")
+    parser.add_argument("--max-lag", type=float, default=None,
+                        help="seconds behind schedule before dropping the missed slots")
+    parser.add_argument("--warmup", type=float, default=1.0,
+                        help="seconds generating ahead before sending")
+    parser.add_argument("--report-every", type=float, default=None,
+                        help="seconds between stats lines on stderr")
+    parser.add_argument("--text-pool-size", type=int, default=None)
+    parser.add_argument("--fast-start", action="store_true",
+                        help="build the factory with only the Faker providers it uses")
+    args = parser.parse_args(argv)
+    if args.duration is None and args.total is None:
+        parser.error("one of --duration or --total is needed")
+
+    factory_kwargs = dict()
+    if args.text_pool_size:
+        factory_kwargs["text_pool_size"] = args.text_pool_size
+    if args.fast_start:
+        factory_kwargs["fast_start"] = True
+
+    def report(stats):
+        print(json.dumps(stats), file=sys.stderr, flush=True)
+
+    generator = LoadGenerator(open_sink(args.output), args.rate, unit=args.unit,
+                              rate_unit=args.rate_unit, ramp_to=args.ramp_to,
+                              ramp_seconds=args.ramp_seconds, seed=args.seed,
+                              start_index=args.start_index, prefetch=args.prefetch,
+                              max_lag=args.max_lag, end_date=args.end_date, **factory_kwargs)
+    try:
+        generator.start()
+        time.sleep(args.warmup)
+        stats = generator.run(duration=args.duration, total=args.total,
+                              report_every=args.report_every, report=report)
+    finally:
+        generator.close()
+    report(stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
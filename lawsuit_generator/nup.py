@@ -0,0 +1,186 @@
+"""CNJ lawsuit number (NUP) rules.
+
+mask = NNNNNNN-DD.AAAA.J.TR.OOOO
+  * NNNNNNN: lawsuit id
+  * DD: check digits, 98 - (NNNNNNNAAAAJTROOOO00 mod 97)
+  * AAAA: year, J: segment, TR: region, OOOO: origin
+"""
+from lawsuit_generator.court_data import COURT_CODES, SEGMENT_REGIONS
+
+SEGMENTS = tuple(SEGMENT_REGIONS)
+
+#NOTE Weight (mod 97) of each component on NNNNNNNAAAAJTROOOO00
+ID_WEIGHT = pow(10, 13, 97)
+YEAR_WEIGHT = pow(10, 9, 97)
+SEGMENT_WEIGHT = pow(10, 8, 97)
+REGION_WEIGHT = pow(10, 6, 97)
+ORIGIN_WEIGHT = 100 % 97
+
+DV_STRINGS = tuple(str(dv).zfill(2) for dv in range(100))
+ORIGIN_STRINGS = tuple(str(origin).zfill(4) for origin in range(10000))
+
+#NOTE Per segment: tuple of (".J.TR.", court_house, remainder of J and TR)
+COURT_COMPONENTS = {
+    segment: tuple((f".{segment}.{region}.", COURT_CODES[(segment, region)],
+                    (int(segment) * SEGMENT_WEIGHT + int(region) * REGION_WEIGHT) % 97)
+                   for region in regions)
+    for segment, regions in SEGMENT_REGIONS.items()
+}
+
+
+def check_digit(nup_id: int, year: int, segment: int, region: int, origin: int) -> int:
+    """Calculate the CNJ check digits of a lawsuit number.
+
+    Same result as LawsuitFactory.generate_fake_dv, without building the
+    18 digits integer.
+
+    :param nup_id: Lawsuit id - First 7 digits
+    :type nup_id: int
+    :param year: Lawsuit year start
+    :type year: int
+    :param segment: Lawsuit juridical segment
+    :type segment: int
+    :param region: Lawsuit state/region
+    :type region: int
+    :param origin: Lawsuit origin
+    :type origin: int
+    :return: Check digits, from 2 to 98
+    :rtype: int
+    """
+    remainder = (nup_id * ID_WEIGHT + year * YEAR_WEIGHT + segment * SEGMENT_WEIGHT
+                 + region * REGION_WEIGHT + origin * ORIGIN_WEIGHT) % 97
+    return 98 - remainder
+
+
+def generate_nups(rnd, total: int, min_year: int, max_year: int,
+                  details: bool=False) -> list:
+    """Generate many valid lawsuit numbers in one pass.
+
+    All random components are drawn first, then numbers are assembled with
+    the precomputed string and remainder tables.
+
+    :param rnd: Random source, like Faker().random
+    :type rnd: random.Random
+    :param total: Total of numbers to generate
+    :type total: int
+    :param min_year: Minimal lawsuit year
+    :type min_year: int
+    :param max_year: Maximal lawsuit year
+    :type max_year: int
+    :param details: Return dicts like LawsuitFactory.generate_nup instead of
+        only the complete numbers, defaults to False
+    :type details: bool, optional
+    :return: Lawsuit numbers generated
+    :rtype: list
+    """
+    #NOTE random() scaling is several times cheaper than randrange per draw
+    rand = rnd.random
+    segment_components = [COURT_COMPONENTS[segment] for segment in SEGMENTS]
+    total_years = max_year - min_year + 1
+    ids = [1000000 + int(rand() * 9000000) for _ in range(total)]
+    years = [min_year + int(rand() * total_years) for _ in range(total)]
+    courts = list()
+    for _ in range(total):
+        components = segment_components[int(rand() * len(segment_components))]
+        courts.append(components[int(rand() * len(components))])
+    origins = [1000 + int(rand() * 9000) for _ in range(total)]
+
+    nups = list()
+    for nup_id, year, court, origin in zip(ids, years, courts, origins):
+        court_part, court_house, court_remainder = court
+        remainder = (nup_id * ID_WEIGHT + year * YEAR_WEIGHT + court_remainder
+                     + origin * ORIGIN_WEIGHT) % 97
+        complete = f"{nup_id}-{DV_STRINGS[98 - remainder]}.{year}{court_part}{ORIGIN_STRINGS[origin]}"
+        if details:
+            nups.append({"complete": complete,
+                         "year": str(year),
+                         "segment": court_part[1],
+                         "region": court_part[3:5],
+                         "origin": ORIGIN_STRINGS[origin],
+                         "court_house": court_house})
+        else:
+            nups.append(complete)
+    return nups
+
+
+MASK_CHARS = str.maketrans("", "", "-.")
+PARSED_FIELDS = ("number", "valid", "lawsuit_id", "check_digit", "year",
+                 "segment", "region", "origin", "court_house")
+
+
+def _unmask(number: str) -> str:
+    """Get the 20 digits of a masked or unmasked lawsuit number.
+
+    :param number: Lawsuit number, like 0000001-45.2020.8.26.0001 or 00000014520208260001
+    :type number: str
+    :return: The 20 digits, or None if the number is malformed
+    :rtype: str
+    """
+    if len(number) == 25:
+        if (number[7] != "-" or number[10] != "." or number[15] != "."
+                or number[17] != "." or number[20] != "."):
+            return None
+        number = number.translate(MASK_CHARS)
+    if len(number) != 20 or not number.isdigit() or not number.isascii():
+        return None
+    return number
+
+
+def is_valid_digits(digits: str) -> bool:
+    """Check the mod-97 rule on the 20 digits of a lawsuit number.
+
+    :param digits: NNNNNNNDDAAAAJTROOOO
+    :type digits: str
+    :return: If the check digits match the number
+    :rtype: bool
+    """
+    return int(digits[:7] + digits[9:] + digits[7:9]) % 97 == 1
+
+
+def validate_nups(numbers) -> list:
+    """Validate many lawsuit numbers, masked or unmasked.
+
+    :param numbers: Iterable of lawsuit numbers
+    :type numbers: iterable
+    :return: One bool per number, True when format and check digits are right
+    :rtype: list
+    """
+    results = list()
+    for number in numbers:
+        digits = _unmask(number) if isinstance(number, str) else None
+        results.append(digits is not None and is_valid_digits(digits))
+    return results
+
+
+def parse_nups(numbers) -> dict:
+    """Parse many lawsuit numbers, masked or unmasked, into columns.
+
+    Invalid numbers keep their row, with valid False and the other fields
+    None, so every column is aligned with the input.
+
+    :param numbers: Iterable of lawsuit numbers
+    :type numbers: iterable
+    :return: Column name (see PARSED_FIELDS) to list of values; number is
+        the masked form and court_house is None for unknown segment/region
+    :rtype: dict
+    """
+    columns = {field: list() for field in PARSED_FIELDS}
+    append_number = columns["number"].append
+    append_valid = columns["valid"].append
+    component_columns = [columns[field].append for field in PARSED_FIELDS[2:]]
+    empty_row = (None,) * len(component_columns)
+    for number in numbers:
+        digits = _unmask(number) if isinstance(number, str) else None
+        if digits is None or not is_valid_digits(digits):
+            append_number(None)
+            append_valid(False)
+            row = empty_row
+        else:
+            segment, region, origin = digits[13], digits[14:16], digits[16:]
+            append_number(f"{digits[:7]}-{digits[7:9]}.{digits[9:13]}.{segment}.{region}.{origin}")
+            append_valid(True)
+            row = (digits[:7], digits[7:9], digits[9:13], segment, region, origin,
+                   COURT_CODES.get((segment, region)))
+        for append, value in zip(component_columns, row):
+            append(value)
+    return columns
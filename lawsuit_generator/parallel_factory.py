@@ -0,0 +1,141 @@
+from datetime import date
+import gc
+from multiprocessing import Pool
+import os
+import random
+
+from lawsuit_generator.lawsuit_factory import LawsuitFactory
+
+_WORKER_FACTORY = None
+_WORKER_KWARGS = None
+
+
+def _init_worker(factory_kwargs: dict):
+    """Build the factory used by a worker process, once per process.
+
+    The factory is kept in the module global _WORKER_FACTORY and reused
+    whenever factory_kwargs compare equal to the ones it was built with: in
+    forked workers that inherited a warm_factory, on the in-process
+    workers == 1 path and in the async_producer process pools, which use
+    this initializer too.
+
+    :param factory_kwargs: LawsuitFactory arguments, seed and end_date included
+    :type factory_kwargs: dict
+    """
+    global _WORKER_FACTORY, _WORKER_KWARGS
+    if _WORKER_FACTORY is not None and _WORKER_KWARGS == factory_kwargs:
+        return
+    _WORKER_FACTORY = LawsuitFactory(**factory_kwargs)
+    _WORKER_KWARGS = dict(factory_kwargs)
+
+
+def warm_factory(master_seed: int, end_date: date=None, freeze: bool=False,
+                 **factory_kwargs) -> LawsuitFactory:
+    """Build the worker factory in this process before the pool is created.
+
+    Workers forked afterwards (the default start method on Linux) inherit
+    it, Faker providers, text and entity pools included, instead of each one
+    building its own. Pass the same master_seed, end_date and factory_kwargs
+    to generate_parallel_folders or agenerate_folders, with spawn workers or
+    other arguments the factory is built as usual. The warm factory stays
+    in this process as _WORKER_FACTORY, see _init_worker, and is also used
+    by workers == 1 runs with the same arguments.
+
+    :param master_seed: Seed of the whole generation
+    :type master_seed: int
+    :param end_date: Latest date for generated dates, defaults to today
+    :type end_date: date, optional
+    :param freeze: Move every object to the permanent garbage collector
+        generation (gc.freeze), so collections in the workers do not touch,
+        and copy, the inherited memory pages. The objects of this process
+        stay out of collection until gc.unfreeze() is called, defaults to False
+    :type freeze: bool, optional
+    :param factory_kwargs: Other LawsuitFactory arguments, like text_pool_size
+    :return: The warm factory, see its startup_seconds
+    :rtype: LawsuitFactory
+    """
+    factory_kwargs.update(seed=master_seed, end_date=end_date or date.today())
+    _init_worker(factory_kwargs)
+    if freeze:
+        gc.freeze()
+    return _WORKER_FACTORY
+
+
+def _generate_chunk(task: tuple, factory: LawsuitFactory=None) -> list:
+    """Generate one chunk of folders inside a worker process.
+
+    :param task: Tuple with (start_index, total, serialize)
+    :type task: tuple
+    :param factory: Factory used instead of _WORKER_FACTORY, defaults to None
+    :type factory: LawsuitFactory, optional
+    :return: Folders generated, or their json representation
+    :rtype: list
+    """
+    start_index, total, serialize = task
+    factory = factory or _WORKER_FACTORY
+    folders = list()
+    for folder_obj in factory.generate_multiple_folders(total_folders=total,
+                                                        start_index=start_index):
+        folders.append(folder_obj.to_json() if serialize else folder_obj)
+    return folders
+
+
+def generate_parallel_folders(total_folders: int, master_seed: int=None,
+                              workers: int=None, chunk_size: int=100,
+                              ordered: bool=True, serialize: bool=False,
+                              end_date: date=None, start_index: int=0,
+                              **factory_kwargs):
+    """Generate lawsuit Folders split across a process pool.
+
+    Every folder is seeded from (master_seed, folder index), see
+    LawsuitFactory.generate_folder_at, so for the same master seed the
+    folders generated are the same whatever the number of workers or the
+    chunk size.
+
+    :param total_folders: Total of Lawsuit Folders to generate
+    :type total_folders: int
+    :param master_seed: Seed of the whole generation, defaults to a random one
+    :type master_seed: int, optional
+    :param workers: Number of worker processes, defaults to os.cpu_count()
+    :type workers: int, optional
+    :param chunk_size: Folders generated by each task, defaults to 100
+    :type chunk_size: int, optional
+    :param ordered: Yield folders in generation order, defaults to True
+    :type ordered: bool, optional
+    :param serialize: Yield folder.to_json() instead of FakeFolder, defaults to False
+    :type serialize: bool, optional
+    :param end_date: Latest date for generated dates, defaults to today
+    :type end_date: date, optional
+    :param start_index: Index of the first folder, defaults to 0
+    :type start_index: int, optional
+    :param factory_kwargs: Other LawsuitFactory arguments, like text_pool_size
+    :return: Folders generated, one by one
+    :rtype: generator
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be greater than zero")
+    if master_seed is None:
+        master_seed = random.getrandbits(64)
+    factory_kwargs.update(seed=master_seed, end_date=end_date or date.today())
+    workers = workers or os.cpu_count() or 1
+
+    tasks = list()
+    last_index = start_index + total_folders
+    for start in range(start_index, last_index, chunk_size):
+        total = min(chunk_size, last_index - start)
+        tasks.append((start, total, serialize))
+
+    if workers == 1:
+        _init_worker(factory_kwargs)
+        for task in tasks:
+            yield from _generate_chunk(task)
+        return
+
+    with Pool(processes=workers, initializer=_init_worker,
+              initargs=(factory_kwargs,)) as pool:
+        if ordered:
+            results = pool.imap(_generate_chunk, tasks)
+        else:
+            results = pool.imap_unordered(_generate_chunk, tasks)
+        for chunk in results:
+            yield from chunk
@@ -0,0 +1,63 @@
+from functools import wraps
+import time
+
+#NOTE Factory methods timed by an instrumented LawsuitFactory
+STAGES = ("generate_nup", "generate_nups", "generate_status", "generate_part",
+          "generate_header", "generate_progress", "generate_publication",
+          "generate_appendix", "generate_petition", "generate_auditions",
+          "generate_classification", "generate_classification_batch",
+          "generate_full_lawsuit", "generate_full_folder")
+
+
+class StageTimer():
+    def __init__(self):
+        """Cumulative wall time and calls per generation stage.
+
+        Times are inclusive: generate_full_lawsuit also counts the time of the
+        header, parts and events it generates.
+        """
+        self.seconds = dict()
+        self.calls = dict()
+
+    def instrument(self, factory, stages: tuple=STAGES):
+        """Wrap the factory methods so every call is timed.
+
+        Only the given instance is changed, factories built without
+        instrumentation keep the plain methods.
+
+        :param factory: Factory to instrument
+        :type factory: LawsuitFactory
+        :param stages: Method names to time, defaults to STAGES
+        :type stages: tuple, optional
+        """
+        for stage in stages:
+            setattr(factory, stage, self._timed(stage, getattr(factory, stage)))
+
+    def _timed(self, stage: str, method):
+        self.seconds.setdefault(stage, 0.0)
+        self.calls.setdefault(stage, 0)
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+                self.calls[stage] += 1
+        return wrapper
+
+    def reset(self):
+        """Zero every counter."""
+        for stage in self.seconds:
+            self.seconds[stage] = 0.0
+            self.calls[stage] = 0
+
+    def report(self) -> dict:
+        """Time spent per stage.
+
+        :return: Stage name to {"calls", "seconds"}
+        :rtype: dict
+        """
+        return {stage: {"calls": self.calls[stage], "seconds": self.seconds[stage]}
+                for stage in self.seconds}
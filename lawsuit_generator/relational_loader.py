@@ -0,0 +1,353 @@
+import os
+import sqlite3
+
+from lawsuit_generator.columnar_export import EVENT_TABLES, HEADER_FIELDS
+
+LAWSUIT_RELATIONS = (("appeal", "appeals_list"), ("recourse", "recourses_list"),
+                     ("attached", "attached_list"), ("dependent", "dependent_list"))
+
+#NOTE role, FakeLawsuit attribute, table
+PART_TABLES = (("active", "part_active_list", "parts"),
+               ("active", "part_active_lawyer_list", "lawyers"),
+               ("passive", "part_passive_list", "parts"),
+               ("passive", "part_passive_lawyer_list", "lawyers"),
+               ("other", "part_other_list", "parts"))
+
+#NOTE table name: ((column, type), ...), types valid on SQLite and PostgreSQL
+SCHEMA = {
+    "folders": (("folder_id", "INTEGER"), ("main_number", "TEXT"), ("book_name", "TEXT"),
+                ("court_house", "TEXT")),
+    "lawsuits": (("lawsuit_id", "INTEGER"), ("folder_id", "INTEGER"),
+                 ("lawsuit_number", "TEXT"), ("relation", "TEXT"), ("year", "TEXT"),
+                 ("segment", "TEXT"), ("region", "TEXT"), ("origin", "TEXT"),
+                 ("court_house", "TEXT"), ("status", "TEXT"), ("instance", "INTEGER"),
+                 ("is_secret", "BOOLEAN")),
+    "headers": (("lawsuit_id", "INTEGER"),) + tuple((field, "TEXT") for field in HEADER_FIELDS),
+    "parts": (("lawsuit_id", "INTEGER"), ("role", "TEXT"), ("position", "INTEGER"),
+              ("nome", "TEXT"), ("documento", "TEXT")),
+    "lawyers": (("lawsuit_id", "INTEGER"), ("role", "TEXT"), ("position", "INTEGER"),
+                ("nome", "TEXT"), ("oab", "TEXT")),
+    "classifications": (("lawsuit_id", "INTEGER"), ("position", "INTEGER"),
+                        ("tipo_evento", "TEXT"), ("evento_index", "INTEGER"),
+                        ("classificacao", "TEXT"), ("ativo", "BOOLEAN"),
+                        ("inicio", "INTEGER"), ("fim", "INTEGER"), ("termo", "TEXT")),
+}
+for _table_name, (_, _fields) in EVENT_TABLES.items():
+    SCHEMA[_table_name] = ((("lawsuit_id", "INTEGER"), ("position", "INTEGER"))
+                           + tuple((field, "INTEGER" if field == "qtd_pessoas" else "TEXT")
+                                   for field in _fields))
+
+#NOTE Tables not listed use (lawsuit_id, position)
+PRIMARY_KEYS = {"folders": ("folder_id",), "lawsuits": ("lawsuit_id",),
+                "headers": ("lawsuit_id",), "parts": ("lawsuit_id", "role", "position"),
+                "lawyers": ("lawsuit_id", "role", "position")}
+
+#NOTE Created after the load, indexes slow down inserts
+INDEXES = (("lawsuits", "lawsuit_number"), ("lawsuits", "folder_id"))
+
+
+def create_table_statements() -> list:
+    """CREATE TABLE statements of SCHEMA, for SQLite and PostgreSQL.
+
+    :return: One statement per table
+    :rtype: list
+    """
+    statements = list()
+    for table_name, columns in SCHEMA.items():
+        definitions = [f"{column} {column_type}" for column, column_type in columns]
+        primary_key = PRIMARY_KEYS.get(table_name, ("lawsuit_id", "position"))
+        definitions.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+        statements.append(f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(definitions)})")
+    return statements
+
+
+def create_index_statements() -> list:
+    """CREATE INDEX statements of INDEXES."""
+    return [f"CREATE INDEX IF NOT EXISTS {table_name}_{column}_idx ON {table_name} ({column})"
+            for table_name, column in INDEXES]
+
+
+class RelationalLoader():
+    def __init__(self, batch_size: int=10000):
+        """Map folders to the normalized SCHEMA rows.
+
+        Folders and lawsuits get sequential ids, every other table refers to
+        its lawsuit_id. Rows are buffered per table and handed to
+        _write_rows in batches of batch_size rows. Subclasses write them.
+
+        :param batch_size: Rows per batch, defaults to 10000
+        :type batch_size: int, optional
+        """
+        self.batch_size = batch_size
+        self.total_rows = {table_name: 0 for table_name in SCHEMA}
+        self._rows = {table_name: list() for table_name in SCHEMA}
+        self._next_folder_id = 1
+        self._next_lawsuit_id = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(failed=exc_type is not None)
+
+    def add_folder(self, folder):
+        """Add a folder and every lawsuit of it.
+
+        :param folder: Folder generated by LawsuitFactory
+        :type folder: FakeFolder | CompactFolder
+        """
+        folder_id = self._next_folder_id
+        self._next_folder_id += 1
+        self._add_row("folders", (folder_id, folder.main_number, folder.book_name,
+                                  folder.court_house))
+        self.add_lawsuit(folder.main_lawsuit, folder_id, "main")
+        for relation, attribute in LAWSUIT_RELATIONS:
+            for lawsuit in getattr(folder, attribute):
+                self.add_lawsuit(lawsuit, folder_id, relation)
+
+    def add_folders(self, folders) -> int:
+        """Consume a folders iterable, like generate_multiple_folders.
+
+        :param folders: Iterable of FakeFolder
+        :type folders: iterable
+        :return: Total of folders added
+        :rtype: int
+        """
+        total = 0
+        for folder in folders:
+            self.add_folder(folder)
+            total += 1
+        return total
+
+    def add_lawsuit(self, lawsuit, folder_id: int=None, relation: str="main") -> int:
+        """Add a lawsuit with its header, parts, lawyers, events and
+        classifications.
+
+        :param lawsuit: Lawsuit generated by LawsuitFactory
+        :type lawsuit: FakeLawsuit | CompactLawsuit
+        :param folder_id: Id of its folder row, defaults to None
+        :type folder_id: int, optional
+        :param relation: main, appeal, recourse, attached or dependent,
+            defaults to "main"
+        :type relation: str, optional
+        :return: lawsuit_id given to the lawsuit
+        :rtype: int
+        """
+        lawsuit_id = self._next_lawsuit_id
+        self._next_lawsuit_id += 1
+        lawsuit = lawsuit.to_json(classification_refs=True)
+        self._add_row("lawsuits", (
+            lawsuit_id, folder_id, lawsuit["lawsuit_number"], relation, lawsuit["year"],
+            lawsuit["segment"], lawsuit["region"], lawsuit["origin"], lawsuit["court_house"],
+            lawsuit["status"], lawsuit["instance"], bool(lawsuit["is_secret"])))
+        if lawsuit["is_secret"]:
+            return lawsuit_id
+
+        header = lawsuit["header"] or {}
+        self._add_row("headers", (lawsuit_id, *(header.get(field) for field in HEADER_FIELDS)))
+        for role, attribute, table_name in PART_TABLES:
+            for position, part in enumerate(lawsuit[attribute]):
+                if part:
+                    self._add_row(table_name, (lawsuit_id, role, position, part["nome"],
+                                               part.get("documento")))
+        for table_name, (attribute, fields) in EVENT_TABLES.items():
+            for position, event in enumerate(lawsuit[attribute]):
+                self._add_row(table_name, (lawsuit_id, position,
+                                           *(event.get(field) for field in fields)))
+        for position, classification in enumerate(lawsuit["classification_list"]):
+            match = classification["match"]
+            self._add_row("classifications", (
+                lawsuit_id, position, classification["tipo_evento"],
+                classification["evento_index"], classification["classificacao"],
+                classification["ativo"], match["inicio"], match["fim"], match["termo"]))
+        return lawsuit_id
+
+    def flush(self):
+        """Write every buffered row."""
+        for table_name, rows in self._rows.items():
+            if rows:
+                self._write_rows(table_name, rows)
+                self._rows[table_name] = list()
+
+    def close(self, failed: bool=False):
+        """Write pending rows.
+
+        :param failed: The load failed, pending rows are dropped instead,
+            defaults to False
+        :type failed: bool, optional
+        """
+        if not failed:
+            self.flush()
+
+    def _add_row(self, table_name: str, row: tuple):
+        rows = self._rows[table_name]
+        rows.append(row)
+        self.total_rows[table_name] += 1
+        if len(rows) >= self.batch_size:
+            self._write_rows(table_name, rows)
+            self._rows[table_name] = list()
+
+    def _write_rows(self, table_name: str, rows: list):
+        raise NotImplementedError
+
+
+class SQLiteLoader(RelationalLoader):
+    def __init__(self, path: str, batch_size: int=10000, transaction_rows: int=1000000,
+                 create_indexes: bool=True):
+        """Load folders into a SQLite database with the normalized SCHEMA.
+
+        Rows go in with executemany, batch_size rows per call, inside
+        transactions of about transaction_rows rows. The journal is kept in
+        memory and syncs are turned off while loading, as the file is a
+        disposable fixture. Loading into a database that already has rows
+        appends to it, ids continue from the largest ones in it.
+
+        :param path: Database file path
+        :type path: str
+        :param batch_size: Rows per executemany, defaults to 10000
+        :type batch_size: int, optional
+        :param transaction_rows: Rows per transaction, defaults to 1000000
+        :type transaction_rows: int, optional
+        :param create_indexes: Create INDEXES on close, defaults to True
+        :type create_indexes: bool, optional
+        """
+        super().__init__(batch_size)
+        self.path = path
+        self.transaction_rows = transaction_rows
+        self.create_indexes = create_indexes
+        self._uncommitted_rows = 0
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        #NOTE A memory journal, with it off ROLLBACK does not work
+        self.connection.execute("PRAGMA journal_mode=MEMORY")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        for statement in create_table_statements():
+            self.connection.execute(statement)
+        self._next_folder_id = self._next_id("folders", "folder_id")
+        self._next_lawsuit_id = self._next_id("lawsuits", "lawsuit_id")
+        self._inserts = {table_name: f"INSERT INTO {table_name} VALUES "
+                                     f"({', '.join('?' * len(columns))})"
+                         for table_name, columns in SCHEMA.items()}
+        self.connection.execute("BEGIN")
+
+    def _next_id(self, table_name: str, column: str) -> int:
+        return self.connection.execute(
+            f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table_name}").fetchone()[0]
+
+    def _write_rows(self, table_name: str, rows: list):
+        self.connection.executemany(self._inserts[table_name], rows)
+        self._uncommitted_rows += len(rows)
+        if self._uncommitted_rows >= self.transaction_rows:
+            self.connection.execute("COMMIT")
+            self.connection.execute("BEGIN")
+            self._uncommitted_rows = 0
+
+    def close(self, failed: bool=False):
+        """Write pending rows, commit, create the indexes and close.
+
+        :param failed: The load failed, roll back the open transaction
+            instead, transactions already committed are kept, defaults to False
+        :type failed: bool, optional
+        """
+        if self.connection is None:
+            return
+        if failed:
+            self.connection.execute("ROLLBACK")
+            self.connection.close()
+            self.connection = None
+            return
+        self.flush()
+        self.connection.execute("COMMIT")
+        if self.create_indexes:
+            for statement in create_index_statements():
+                self.connection.execute(statement)
+        self.connection.close()
+        self.connection = None
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    if isinstance(value, int):
+        return str(value)
+    return (value.replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+class CopyWriter(RelationalLoader):
+    def __init__(self, directory: str, batch_size: int=10000):
+        """Write folders as PostgreSQL COPY text files, one per table.
+
+        The directory also gets a load.sql with the CREATE TABLE, \\copy and
+        CREATE INDEX commands, to run with psql -f load.sql from it.
+
+        :param directory: Directory where the files are written
+        :type directory: str
+        :param batch_size: Rows buffered per table before writing, defaults to 10000
+        :type batch_size: int, optional
+        """
+        super().__init__(batch_size)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._files = {table_name: open(os.path.join(directory, f"{table_name}.copy"), "w",
+                                        encoding="utf-8", newline="\n")
+                       for table_name in SCHEMA}
+        with open(os.path.join(directory, "load.sql"), "w", encoding="utf-8") as load_file:
+            for statement in create_table_statements():
+                load_file.write(statement + ";\n")
+            for table_name in SCHEMA:
+                load_file.write(f"\\copy {table_name} FROM '{table_name}.copy'\n")
+            for statement in create_index_statements():
+                load_file.write(statement + ";\n")
+
+    def _write_rows(self, table_name: str, rows: list):
+        self._files[table_name].write("".join(
+            "\t".join([_copy_value(value) for value in row]) + "\n" for row in rows))
+
+    def close(self, failed: bool=False):
+        """Write pending rows and close every file.
+
+        :param failed: The load failed, pending rows are dropped instead,
+            defaults to False
+        :type failed: bool, optional
+        """
+        if self._files is None:
+            return
+        if not failed:
+            self.flush()
+        for copy_file in self._files.values():
+            copy_file.close()
+        self._files = None
+
+
+def load_sqlite(path: str, folders, **kwargs) -> dict:
+    """Load folders into a SQLite database, see SQLiteLoader.
+
+    :param path: Database file path
+    :type path: str
+    :param folders: Iterable of FakeFolder
+    :type folders: iterable
+    :return: Total of rows written per table
+    :rtype: dict
+    """
+    with SQLiteLoader(path, **kwargs) as loader:
+        loader.add_folders(folders)
+    return loader.total_rows
+
+
+def write_copy_files(directory: str, folders, **kwargs) -> dict:
+    """Write folders as PostgreSQL COPY files, see CopyWriter.
+
+    :param directory: Directory where the files are written
+    :type directory: str
+    :param folders: Iterable of FakeFolder
+    :type folders: iterable
+    :return: Total of rows written per table
+    :rtype: dict
+    """
+    with CopyWriter(directory, **kwargs) as writer:
+        writer.add_folders(folders)
+    return writer.total_rows
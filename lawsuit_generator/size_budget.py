@@ -0,0 +1,276 @@
+from datetime import date
+import json
+import random
+
+from lawsuit_generator.fake_lawsuit import EVENT_LISTS, LAWSUIT_FIELDS, PART_LISTS
+from lawsuit_generator.lawsuit_factory import LawsuitFactory
+from lawsuit_generator.parallel_factory import generate_parallel_folders, warm_factory
+
+FOLDER_LISTS = (("appeals", "appeals_list"), ("recourses", "recourses_list"),
+                ("attached", "attached_list"), ("dependents", "dependent_list"))
+
+
+def flat_size(obj: dict) -> int:
+    """Characters of json.dumps(obj) for a dict of scalars, exact for
+    strings without escapes.
+
+    :param obj: Dict of str, int, bool or None, or None
+    :type obj: dict
+    :return: Estimated size
+    :rtype: int
+    """
+    if obj is None:
+        return 4
+    size = 0
+    for key, value in obj.items():
+        if value.__class__ is str:
+            size += len(key) + len(value) + 8
+        else:
+            size += len(key) + len(json.dumps(value)) + 6
+    return size or 2
+
+
+def _list_size(items: list, item_size) -> int:
+    if not items:
+        return 2
+    return sum(map(item_size, items)) + 2 * len(items)
+
+
+def _classification_size(classification: dict) -> int:
+    match = classification["match"]
+    return (flat_size(classification["evento_obj"]) + len(classification["tipo_evento"])
+            + len(classification["classificacao"]) + flat_size(match) + 100)
+
+
+def lawsuit_size(lawsuit) -> int:
+    """Estimated characters of the lawsuit to_json() dumped as JSON.
+
+    Only string lengths are summed, no JSON is built, so it costs a
+    fraction of json.dumps.
+
+    :param lawsuit: Lawsuit generated by LawsuitFactory
+    :type lawsuit: FakeLawsuit
+    :return: Estimated size
+    :rtype: int
+    """
+    scalars = {field: getattr(lawsuit, field) for field in LAWSUIT_FIELDS if field != "header"}
+    size = flat_size(scalars) + flat_size(lawsuit.header) + len("header") + 6
+    for list_name in EVENT_LISTS + PART_LISTS:
+        size += len(list_name) + 6 + _list_size(getattr(lawsuit, list_name), flat_size)
+    size += len("classification_list") + 6 + _list_size(lawsuit.classification_list,
+                                                         _classification_size)
+    return size
+
+
+def folder_size(folder) -> int:
+    """Estimated bytes of the folder as a JSON line, see lawsuit_size.
+
+    Compact folders already hold their encoded JSON, their size is exact.
+
+    :param folder: Folder generated by LawsuitFactory
+    :type folder: FakeFolder | CompactFolder
+    :return: Estimated size
+    :rtype: int
+    """
+    if hasattr(folder, "to_bytes"):
+        return len(folder.to_bytes()) + 1
+    size = flat_size({"main_number": folder.main_number, "book_name": folder.book_name,
+                      "court_house": folder.court_house})
+    size += len("main") + 6 + lawsuit_size(folder.main_lawsuit)
+    for key, attribute in FOLDER_LISTS:
+        size += len(key) + 6 + _list_size(getattr(folder, attribute), lawsuit_size)
+    return size + 1
+
+
+class SizeEstimator():
+    def __init__(self, calibrate_every: int=50):
+        """folder_size corrected by the real size of a few folders.
+
+        Every calibrate_every folders one folder is really serialized and
+        the ratio between real UTF-8 bytes and estimated characters
+        (accents, escapes) is updated.
+
+        :param calibrate_every: Folders between calibrations, defaults to 50
+        :type calibrate_every: int, optional
+        """
+        self.calibrate_every = calibrate_every
+        self.total_estimated = 0
+        self.total_measured = 0
+        self._seen = 0
+
+    @property
+    def ratio(self) -> float:
+        """Real bytes per estimated character."""
+        if not self.total_estimated:
+            return 1.0
+        return self.total_measured / self.total_estimated
+
+    def estimate(self, folder) -> int:
+        """Estimated bytes of the folder as a JSON line.
+
+        :param folder: Folder generated by LawsuitFactory
+        :type folder: FakeFolder | CompactFolder
+        :return: Estimated bytes
+        :rtype: int
+        """
+        size = folder_size(folder)
+        if hasattr(folder, "to_bytes"):
+            return size
+        if self.calibrate_every and self._seen % self.calibrate_every == 0:
+            self.total_estimated += size
+            self.total_measured += len(json.dumps(folder.to_json(), ensure_ascii=False)
+                                       .encode("utf-8")) + 1
+        self._seen += 1
+        return int(size * self.ratio)
+
+
+class TargetSizeGenerator():
+    def __init__(self, target_bytes: int, master_seed: int=None, tolerance: float=0.01,
+                 workers: int=1, chunk_size: int=50, end_date: date=None,
+                 start_index: int=0, calibrate_every: int=50, max_shape_attempts: int=8,
+                 **factory_kwargs):
+        """Generate folders until their JSON Lines size reaches target_bytes.
+
+        The size of each folder is estimated as it is generated (see
+        SizeEstimator), no second pass is needed. A folder that would pass
+        target_bytes * (1 + tolerance) is generated again, same index, with
+        the size profile scaled down to the space left, halving the scale on
+        every attempt. Generation stops once target_bytes * (1 - tolerance)
+        is reached.
+
+        With workers > 1 most folders come from generate_parallel_folders
+        rounds and only the last ones are generated in process. Folders are
+        seeded by (master_seed, index) and accepted in index order, so the
+        output is the same for any number of workers.
+
+        :param target_bytes: Size budget in bytes
+        :type target_bytes: int
+        :param master_seed: Seed of the whole generation, defaults to a random one
+        :type master_seed: int, optional
+        :param tolerance: Accepted relative distance to target_bytes, defaults to 0.01
+        :type tolerance: float, optional
+        :param workers: Number of worker processes, defaults to 1
+        :type workers: int, optional
+        :param chunk_size: Folders per parallel task, defaults to 50
+        :type chunk_size: int, optional
+        :param end_date: Latest date for generated dates, defaults to today
+        :type end_date: date, optional
+        :param start_index: Index of the first folder, defaults to 0
+        :type start_index: int, optional
+        :param calibrate_every: See SizeEstimator, defaults to 50
+        :type calibrate_every: int, optional
+        :param max_shape_attempts: Scaled retries of a folder too big,
+            defaults to 8
+        :type max_shape_attempts: int, optional
+        :param factory_kwargs: Other LawsuitFactory arguments, like text_pool_size
+        """
+        self.target_bytes = target_bytes
+        self.master_seed = random.getrandbits(64) if master_seed is None else master_seed
+        self.tolerance = tolerance
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.end_date = end_date or date.today()
+        self.start_index = start_index
+        self.max_shape_attempts = max_shape_attempts
+        self.factory_kwargs = factory_kwargs
+        self.estimator = SizeEstimator(calibrate_every)
+        self.total_bytes = 0
+        self.total_folders = 0
+        self.shaped_folders = 0
+        self.next_index = start_index
+        self.factory_startup_seconds = None
+
+    @property
+    def done(self) -> bool:
+        """If the budget is reached, within the tolerance."""
+        return self.total_bytes >= self.target_bytes * (1 - self.tolerance)
+
+    def _fits(self, size: int) -> bool:
+        return self.total_bytes + size <= self.target_bytes * (1 + self.tolerance)
+
+    def _place(self, factory, folder) -> tuple:
+        size = self.estimator.estimate(folder)
+        if self._fits(size):
+            return folder, size, False
+        folder, size = self._shaped_folder(factory, size)
+        return folder, size, True
+
+    def _accept(self, size: int, shaped: bool):
+        self.total_bytes += size
+        self.total_folders += 1
+        self.shaped_folders += shaped
+        self.next_index += 1
+
+    def _shaped_folder(self, factory, size: int):
+        profile = factory.size_profile
+        factor = (self.target_bytes - self.total_bytes) / size
+        try:
+            for _ in range(self.max_shape_attempts):
+                factory.size_profile = profile.scaled(factor)
+                folder = factory.generate_folder_at(self.next_index)
+                size = self.estimator.estimate(folder)
+                if self._fits(size):
+                    return folder, size
+                factor /= 2
+        finally:
+            factory.size_profile = profile
+        return None, None
+
+    def __iter__(self):
+        """Folders generated, in index order.
+
+        :return: Folders
+        :rtype: generator
+        """
+        if self.workers > 1:
+            #NOTE Workers forked for the parallel rounds inherit this factory
+            factory = warm_factory(self.master_seed, self.end_date, **self.factory_kwargs)
+        else:
+            factory = LawsuitFactory(seed=self.master_seed, end_date=self.end_date,
+                                     **self.factory_kwargs)
+        self.factory_startup_seconds = factory.startup_seconds
+        while not self.done:
+            #NOTE Parallel rounds ask for 90% of the folders the budget left
+            # should take, the last folders are generated here
+            mean_size = self.total_bytes / self.total_folders if self.total_folders else None
+            round_total = 0
+            if self.workers > 1 and mean_size:
+                round_total = int(0.9 * (self.target_bytes - self.total_bytes) / mean_size)
+            if round_total >= 2 * self.chunk_size:
+                folders = generate_parallel_folders(
+                    round_total, master_seed=self.master_seed, workers=self.workers,
+                    chunk_size=self.chunk_size, end_date=self.end_date,
+                    start_index=self.next_index, **self.factory_kwargs)
+                try:
+                    for folder in folders:
+                        folder, size, shaped = self._place(factory, folder)
+                        if folder is None:
+                            return
+                        self._accept(size, shaped)
+                        yield folder
+                        #NOTE After a shaped folder the next round is sized again
+                        if shaped or self.done:
+                            break
+                finally:
+                    folders.close()
+                continue
+
+            folder, size, shaped = self._place(factory, factory.generate_folder_at(self.next_index))
+            if folder is None:
+                return
+            self._accept(size, shaped)
+            yield folder
+
+    def stats(self) -> dict:
+        """Folders and bytes generated so far.
+
+        :return: total_folders, total_bytes, target_bytes, shaped_folders,
+            the estimator ratio and factory_startup_seconds
+        :rtype: dict
+        """
+        return {"total_folders": self.total_folders,
+                "total_bytes": self.total_bytes,
+                "target_bytes": self.target_bytes,
+                "shaped_folders": self.shaped_folders,
+                "estimator_ratio": self.estimator.ratio,
+                "factory_startup_seconds": self.factory_startup_seconds}
@@ -0,0 +1,132 @@
+EVENT_NAMES = ("publication", "progress", "appendix", "petition", "audition")
+
+
+class UniformCount():
+    def __init__(self, max_total: int, min_total: int=0):
+        """Event count drawn uniformly between min_total and max_total."""
+        self.min_total = min_total
+        self.max_total = max_total
+
+    def draw(self, fake, random_int=None) -> int:
+        if random_int is None:
+            return fake.random.randint(self.min_total, self.max_total)
+        return random_int(self.min_total, self.max_total)
+
+
+class FixedCount():
+    def __init__(self, total: int):
+        """Always the same event count."""
+        self.total = total
+
+    def draw(self, fake, random_int=None) -> int:
+        return self.total
+
+
+class ParetoCount():
+    def __init__(self, alpha: float=1.2, scale: float=10, max_total: int=1000000):
+        """Heavy tailed event count: most lawsuits are small, a few are huge.
+
+        :param alpha: Pareto shape, smaller is heavier, defaults to 1.2
+        :type alpha: float, optional
+        :param scale: Typical count, defaults to 10
+        :type scale: float, optional
+        :param max_total: Count cap, defaults to 1000000
+        :type max_total: int, optional
+        """
+        self.alpha = alpha
+        self.scale = scale
+        self.max_total = max_total
+
+    def draw(self, fake, random_int=None) -> int:
+        return min(self.max_total, int(self.scale * (fake.random.paretovariate(self.alpha) - 1)))
+
+
+class LogNormalCount():
+    def __init__(self, mu: float=3.0, sigma: float=1.5, max_total: int=1000000):
+        """Log-normal event count, long tail lighter than Pareto.
+
+        :param mu: Mean of the count logarithm, defaults to 3.0
+        :type mu: float, optional
+        :param sigma: Deviation of the count logarithm, defaults to 1.5
+        :type sigma: float, optional
+        :param max_total: Count cap, defaults to 1000000
+        :type max_total: int, optional
+        """
+        self.mu = mu
+        self.sigma = sigma
+        self.max_total = max_total
+
+    def draw(self, fake, random_int=None) -> int:
+        return min(self.max_total, int(fake.random.lognormvariate(self.mu, self.sigma)))
+
+
+class ScaledCount():
+    def __init__(self, distribution, factor: float):
+        """Counts of another distribution multiplied by factor."""
+        self.distribution = distribution
+        self.factor = factor
+
+    def draw(self, fake, random_int=None) -> int:
+        return int(self.distribution.draw(fake, random_int) * self.factor)
+
+
+class SizeProfile():
+    def __init__(self, **distributions):
+        """Event count distribution of each event list of a lawsuit.
+
+        Lists not given keep the DEFAULT_PROFILE distribution.
+
+        :param distributions: Event name (see EVENT_NAMES) to a count
+            distribution, like UniformCount or ParetoCount
+        """
+        unknown = set(distributions) - set(EVENT_NAMES)
+        if unknown:
+            raise ValueError(f"unknown event lists: {sorted(unknown)}")
+        self.distributions = dict(DEFAULT_DISTRIBUTIONS)
+        self.distributions.update(distributions)
+
+    def draw(self, fake, event_name: str, random_int=None) -> int:
+        """Draw the count of one event list.
+
+        :param fake: Faker instance used as random source
+        :type fake: Faker
+        :param event_name: One of EVENT_NAMES
+        :type event_name: str
+        :param random_int: Function (min, max) drawing uniform counts, like
+            LawsuitFactory._random_int, defaults to None (fake.random)
+        :type random_int: callable, optional
+        :return: Total of events
+        :rtype: int
+        """
+        return self.distributions[event_name].draw(fake, random_int)
+
+    def scaled(self, factor: float):
+        """Same profile with every count multiplied by factor.
+
+        :param factor: Count multiplier
+        :type factor: float
+        :return: Scaled profile
+        :rtype: SizeProfile
+        """
+        return SizeProfile(**{event_name: ScaledCount(distribution, factor)
+                              for event_name, distribution in self.distributions.items()})
+
+
+#NOTE Same counts as the original generate_full_lawsuit
+DEFAULT_DISTRIBUTIONS = {"publication": UniformCount(100),
+                         "progress": UniformCount(100),
+                         "appendix": UniformCount(50),
+                         "petition": UniformCount(30),
+                         "audition": UniformCount(30)}
+
+DEFAULT_PROFILE = SizeProfile()
+PROFILES = {
+    "default": DEFAULT_PROFILE,
+    "heavy_tailed": SizeProfile(publication=ParetoCount(alpha=1.1, scale=20, max_total=50000),
+                                progress=ParetoCount(alpha=1.1, scale=20, max_total=50000),
+                                appendix=LogNormalCount(mu=2.0, sigma=1.2, max_total=5000),
+                                petition=LogNormalCount(mu=1.5, sigma=1.0, max_total=1000),
+                                audition=LogNormalCount(mu=1.0, sigma=1.0, max_total=500)),
+    "giant": SizeProfile(publication=UniformCount(min_total=10000, max_total=50000),
+                         progress=UniformCount(min_total=100000, max_total=500000)),
+}
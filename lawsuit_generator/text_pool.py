@@ -0,0 +1,74 @@
+class TextPool():
+    def __init__(self, fake, size: int=10000, max_bytes: int=64 << 20):
+        """Pre-generated sentences, urls and names to sample event text from.
+
+        Pools are filled once with Faker, up to size items each or until
+        max_bytes of text is used, so text assembly becomes a few random
+        choices instead of Faker calls.
+
+        :param fake: Faker instance used to fill the pools and to sample them
+        :type fake: Faker
+        :param size: Max items per pool, defaults to 10000
+        :type size: int, optional
+        :param max_bytes: Approximate text memory limit of all pools, defaults to 64MiB
+        :type max_bytes: int, optional
+        :raises ValueError: If size is smaller than 1
+        """
+        if size < 1:
+            raise ValueError("size must be greater than zero")
+        self.fake = fake
+        #NOTE sentences are most of the text, they get 70% of the budget
+        self.sentences = self._fill(fake.sentence, size, max_bytes * 0.7)
+        self.urls = self._fill(lambda: fake.uri() + fake.uri_path() + fake.uri_page(),
+                               size, max_bytes * 0.1)
+        self.extensions = self._fill(fake.uri_extension, min(size, 100), max_bytes * 0.05)
+        self.names = self._fill(fake.name, size, max_bytes * 0.15)
+
+    @staticmethod
+    def _fill(generator, size: int, max_bytes: float) -> tuple:
+        items = list()
+        total_bytes = 0
+        while len(items) < size and (not items or total_bytes < max_bytes):
+            item = generator()
+            items.append(item)
+            total_bytes += len(item)
+        return tuple(items)
+
+    @property
+    def total_bytes(self) -> int:
+        """Characters held by all pools."""
+        return sum(len(item) for pool in (self.sentences, self.urls, self.extensions, self.names)
+                   for item in pool)
+
+    def paragraph(self, nb_sentences: int=3) -> str:
+        """Sample a paragraph, with Faker's +-40% variation on the sentence count.
+
+        :param nb_sentences: Base number of sentences, defaults to 3
+        :type nb_sentences: int, optional
+        :return: Paragraph text
+        :rtype: str
+        """
+        rnd = self.fake.random
+        total = max(1, int(nb_sentences * rnd.randint(60, 140) / 100))
+        return " ".join(rnd.choices(self.sentences, k=total))
+
+    def url(self, document: bool=False) -> str:
+        """Sample an url, like uri() + uri_path() + uri_page() + uri_extension().
+
+        :param document: Put a "/" before the extension, as event documents do,
+            defaults to False
+        :type document: bool, optional
+        :return: Url text
+        :rtype: str
+        """
+        rnd = self.fake.random
+        separator = "/" if document else ""
+        return rnd.choice(self.urls) + separator + rnd.choice(self.extensions)
+
+    def name(self) -> str:
+        """Sample a person name.
+
+        :return: Person name
+        :rtype: str
+        """
+        return self.fake.random.choice(self.names)
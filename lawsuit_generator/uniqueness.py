@@ -0,0 +1,126 @@
+import math
+
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+KINDS = ("lawsuit_number", "cpf", "cnpj")
+DOCUMENT_CHARS = str.maketrans("", "", "-./")
+
+
+def _mix(value: int) -> int:
+    """splitmix64 finalizer, spreads an integer key over 64 bits."""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return value ^ (value >> 31)
+
+
+class UniqueRegistry():
+    def __init__(self, capacity: int=10000000, error_rate: float=0.001,
+                 exact_limit: int=100000, shared: bool=False):
+        """Seen-set of lawsuit numbers and part documents with bounded memory.
+
+        Keys are kept in an exact set while there are at most exact_limit of
+        them, then only in a Bloom filter sized for capacity keys. A Bloom
+        "maybe seen" is handled as a collision, so false positives cost a
+        retry but a value is never accepted twice.
+
+        With shared=True the filter and counters live in shared memory and
+        checks are serialized by a lock, so one registry can be handed to
+        every parallel worker. Shared registries have no exact phase.
+
+        :param capacity: Expected total of keys, defaults to 10000000
+        :type capacity: int, optional
+        :param error_rate: Bloom false positive rate at capacity, defaults to 0.001
+        :type error_rate: float, optional
+        :param exact_limit: Keys kept in the exact set, defaults to 100000
+        :type exact_limit: int, optional
+        :param shared: Share the registry across processes, defaults to False
+        :type shared: bool, optional
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.total_bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.total_hashes = max(1, round(self.total_bits / capacity * math.log(2)))
+        self.shared = shared
+        if shared:
+            #NOTE Only shared registries need multiprocessing, slow to import
+            import multiprocessing
+            self._bits = multiprocessing.RawArray("B", (self.total_bits + 7) // 8)
+            self._counters = multiprocessing.RawArray("q", len(KINDS) + 1)
+            self._lock = multiprocessing.Lock()
+            self._exact = None
+        else:
+            self._bits = bytearray((self.total_bits + 7) // 8)
+            self._counters = [0] * (len(KINDS) + 1)
+            self._lock = None
+            self._exact = set()
+        self.exact_limit = 0 if shared else exact_limit
+
+    @property
+    def total_seen(self) -> int:
+        """Total of keys accepted."""
+        return self._counters[len(KINDS)]
+
+    @property
+    def collisions(self) -> dict:
+        """Total of rejected (retried) values per kind."""
+        return {kind: self._counters[position] for position, kind in enumerate(KINDS)}
+
+    def stats(self) -> dict:
+        """Summary of the registry usage.
+
+        :return: seen, collisions per kind, mode (exact or bloom) and filter size
+        :rtype: dict
+        """
+        return {"seen": self.total_seen,
+                "collisions": self.collisions,
+                "mode": "exact" if self._exact is not None else "bloom",
+                "bloom_bytes": len(self._bits),
+                "bloom_hashes": self.total_hashes}
+
+    def add(self, kind: str, value: str) -> bool:
+        """Register a value if it was not seen yet.
+
+        :param kind: One of KINDS
+        :type kind: str
+        :param value: Lawsuit number or document, masked or not
+        :type value: str
+        :return: True if the value is new, False if it must be regenerated
+        :rtype: bool
+        """
+        kind_position = KINDS.index(kind)
+        key = int(value.translate(DOCUMENT_CHARS)) * len(KINDS) + kind_position
+        if self._lock is None:
+            return self._add_key(key, kind_position)
+        with self._lock:
+            return self._add_key(key, kind_position)
+
+    def _add_key(self, key: int, kind_position: int) -> bool:
+        if self._exact is not None:
+            if key in self._exact:
+                self._counters[kind_position] += 1
+                return False
+            self._exact.add(key)
+            self._set_bits(self._positions(key))
+            self._counters[len(KINDS)] += 1
+            if len(self._exact) > self.exact_limit:
+                self._exact = None
+            return True
+
+        positions = self._positions(key)
+        bits = self._bits
+        if all(bits[position >> 3] & (1 << (position & 7)) for position in positions):
+            self._counters[kind_position] += 1
+            return False
+        self._set_bits(positions)
+        self._counters[len(KINDS)] += 1
+        return True
+
+    def _positions(self, key: int) -> list:
+        first_hash = _mix(key)
+        second_hash = _mix(key ^ 0x9E3779B97F4A7C15) | 1
+        return [(first_hash + position * second_hash) % self.total_bits
+                for position in range(self.total_hashes)]
+
+    def _set_bits(self, positions: list):
+        bits = self._bits
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)